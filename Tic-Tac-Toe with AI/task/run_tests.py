@@ -0,0 +1,69 @@
+"""
+Runs the stage test cases of tests.py in worker processes without starting Python for every case.
+The game module is imported once, every case runs its main() with stdin and stdout replaced by StringIO,
+the output is judged by TicTacToeTest.check like hstest does.
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from multiprocessing import Pool
+from typing import Tuple
+
+from hstest.stage_test import WrongAnswerException
+
+from tests import TicTacToeTest
+from tictactoe import tictactoe
+
+
+def run_case(stdin: str) -> Tuple[str, str]:
+    """Plays one case and returns its output and the error it ended with, if any"""
+    stdout = io.StringIO()
+    error = ''
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(stdin)
+    try:
+        with contextlib.redirect_stdout(stdout):
+            tictactoe.main([])
+    except EOFError:
+        # hstest accepts cases whose input runs out before exit, so does this runner
+        pass
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+    finally:
+        sys.stdin = saved_stdin
+    return stdout.getvalue(), error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all cores by default')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    test = TicTacToeTest('tictactoe.tictactoe')
+    cases = test.generate()
+    with Pool(args.workers) as pool:
+        outputs = pool.map(run_case, [case.input for case in cases], chunksize=1)
+
+    failed = 0
+    for number, (case, (reply, error)) in enumerate(zip(cases, outputs), 1):
+        if error:
+            feedback = error
+        else:
+            try:
+                result = test.check(reply, case.attach)
+                feedback = '' if result.result else result.feedback
+            except WrongAnswerException as exception:
+                feedback = str(exception)
+        if feedback:
+            failed += 1
+            print(f'Test {number} failed: {feedback}')
+    elapsed = time.perf_counter() - started
+    print(f'{len(cases) - failed} of {len(cases)} tests passed in {elapsed:.2f} s')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
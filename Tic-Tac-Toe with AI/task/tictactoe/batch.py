@@ -0,0 +1,112 @@
+"""Simulates thousands of easy/medium games at once on a NumPy array of boards"""
+import argparse
+import time
+
+import numpy as np
+
+from board import board_geometry
+
+POLICIES = ('easy', 'medium')
+# values of BatchSimulator.results
+ONGOING, X_WINS, O_WINS, DRAW = 0, 1, 2, 3
+
+
+class BatchSimulator:
+    """
+    Plays a batch of games between the same two policies in lockstep.
+    Boards are rows of a (games, cells) int8 array holding 1 for X, -1 for O and 0 for an empty cell,
+    wins are found with a product against the matrix of winning lines.
+    The policies follow AI.easy_move (uniformly random empty cell) and AI.medium_move
+    (complete own line, else block the first rival line, else random) of the same board.
+    """
+
+    def __init__(self, games: int, player_1: str = 'easy', player_2: str = 'easy', size: int = 3,
+                 win_length: int = 3, seed: int = None):
+        if player_1 not in POLICIES or player_2 not in POLICIES:
+            raise ValueError(f'Policies should be one of {POLICIES}')
+        geometry = board_geometry(size, win_length)
+        self.policies = {1: player_1, -1: player_2}
+        self.win_length = win_length
+        self.lines = np.array(geometry.lines, dtype=np.intp)
+        self.lines_matrix = np.zeros((geometry.cells_count, len(geometry.lines)), dtype=np.int8)
+        for number, line in enumerate(geometry.lines):
+            self.lines_matrix[list(line), number] = 1
+        self.boards = np.zeros((games, geometry.cells_count), dtype=np.int8)
+        self.results = np.full(games, ONGOING, dtype=np.int8)
+        self.moves = 0
+        self.rng = np.random.default_rng(seed)
+
+    def run(self) -> np.ndarray:
+        """Plays all games to the end and returns their results"""
+        while self.step():
+            pass
+        return self.results
+
+    def step(self) -> bool:
+        """Makes one move in every unfinished game, returns False when all games are over"""
+        active = np.flatnonzero(self.results == ONGOING)
+        if not active.size:
+            return False
+        mark = 1 if self.moves % 2 == 0 else -1
+        boards = self.boards[active]
+        if self.policies[mark] == 'medium':
+            cells = self._medium_cells(boards, mark)
+        else:
+            cells = self._random_cells(boards)
+        boards[np.arange(active.size), cells] = mark
+        self.boards[active] = boards
+        self.moves += 1
+
+        won = ((boards @ self.lines_matrix) == self.win_length * mark).any(axis=1)
+        full = (boards != 0).all(axis=1)
+        self.results[active[won]] = X_WINS if mark == 1 else O_WINS
+        self.results[active[full & ~won]] = DRAW
+        return True
+
+    def _random_cells(self, boards: np.ndarray) -> np.ndarray:
+        """Picks a uniformly random empty cell on every board"""
+        keys = self.rng.random(boards.shape)
+        keys[boards != 0] = -1
+        return keys.argmax(axis=1)
+
+    def _medium_cells(self, boards: np.ndarray, mark: int) -> np.ndarray:
+        """Completes the first own line or blocks the first rival line, otherwise picks a random cell"""
+        cells = self._random_cells(boards)
+        sums = boards @ self.lines_matrix
+        # a line sums to (win_length - 1) * mark only with one empty cell and all others of that mark,
+        # blocks are applied first so that wins overwrite them
+        for target in (-(self.win_length - 1) * mark, (self.win_length - 1) * mark):
+            threats = sums == target
+            found = np.flatnonzero(threats.any(axis=1))
+            line_cells = self.lines[threats[found].argmax(axis=1)]
+            empty = (boards[found[:, None], line_cells] == 0).argmax(axis=1)
+            cells[found] = line_cells[np.arange(found.size), empty]
+        return cells
+
+    def summary(self) -> dict:
+        """Counts of X wins, O wins, draws and unfinished games"""
+        counts = np.bincount(self.results, minlength=4)
+        return {'X': int(counts[X_WINS]), 'O': int(counts[O_WINS]), 'Draw': int(counts[DRAW]),
+                'Ongoing': int(counts[ONGOING])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('player_1', choices=POLICIES)
+    parser.add_argument('player_2', choices=POLICIES)
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    simulator = BatchSimulator(args.games, args.player_1, args.player_2, args.size, args.win_length, args.seed)
+    simulator.run()
+    elapsed = time.perf_counter() - started
+    print(simulator.summary())
+    print(f'{args.games} games in {elapsed:.2f} s, {args.games / elapsed:.0f} games per second')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Times board primitives, AI searches and full games, writes the results as JSON
+and optionally fails when a metric regressed against a stored baseline.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from itertools import product
+from statistics import median
+from typing import Callable, Dict, List, Tuple
+
+from board import TicTacToeField, canonical_key
+from tables import TranspositionTable
+from tictactoe import AI, FIELD_ENGINES, TRANSPOSITION_TABLE, create_field
+from tournament import LEVELS, play_game
+
+# metrics in these units get better when they grow, all others are timings
+RATE_UNITS = ('games/s',)
+
+
+def metric(value: float, unit: str = 's') -> Dict:
+    return {'value': value, 'unit': unit}
+
+
+def timed(function: Callable, repeat: int) -> float:
+    """Returns the best wall time of several runs, the least disturbed by the rest of the system"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def sample_positions(engine: str, count: int, seed: int, size: int = 3, win_length: int = 3) -> List[TicTacToeField]:
+    """Collects unfinished positions of random games, every position is a field of its own"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        moves = []
+        game_field = create_field(engine, size, win_length)
+        while not game_field.check_winner() and len(positions) < count:
+            position = create_field(engine, size, win_length)
+            for move in moves:
+                position.move(move)
+            positions.append(position)
+            move = rng.choice(game_field.get_empty_cells())
+            game_field.move(move)
+            moves.append(move)
+    return positions
+
+
+def openings(engine: str) -> List[Tuple]:
+    """First moves that give distinct positions up to the board symmetries"""
+    seen = set()
+    moves = []
+    game_field = create_field(engine)
+    for move in game_field.get_empty_cells():
+        game_field.move(move)
+        key = canonical_key(game_field)
+        game_field.undo(move)
+        if key not in seen:
+            seen.add(key)
+            moves.append(move)
+    return moves
+
+
+def bench_primitives(engine: str, positions: int, repeat: int, seed: int) -> Dict:
+    """Per call time of check_winner, get_empty_cells and _get_priority_cell over sampled positions"""
+    fields = sample_positions(engine, positions, seed)
+    ais = [AI(game_field, game_field.turn, 'medium', verbose=False) for game_field in fields]
+
+    def check_winner():
+        for game_field in fields:
+            game_field.check_winner()
+
+    def get_empty_cells():
+        for game_field in fields:
+            game_field.get_empty_cells()
+
+    def get_priority_cell():
+        for ai in ais:
+            ai._get_priority_cell(ai.mark)
+            ai._get_priority_cell(ai.opponent_mark)
+
+    return {
+        'check_winner': metric(timed(check_winner, repeat) / len(fields)),
+        'get_empty_cells': metric(timed(get_empty_cells, repeat) / len(fields)),
+        # both marks are probed, like medium_move does
+        '_get_priority_cell': metric(timed(get_priority_cell, repeat) / (2 * len(fields))),
+    }
+
+
+def bench_mini_max(engine: str, repeat: int) -> Dict:
+    """Full mini_max solve of every distinct opening, each run starts with an empty transposition table"""
+    results = {}
+    for move in openings(engine):
+        game_field = create_field(engine)
+        game_field.move(move)
+        ai = AI(game_field, game_field.turn, 'hard', verbose=False)
+
+        def solve():
+            ai.transposition_table = TranspositionTable()
+            ai.mini_max(True)
+
+        results[f'mini_max[{move[0]},{move[1]}]'] = metric(timed(solve, repeat))
+    return results
+
+
+def bench_hard_move(engine: str, games: int, seed: int) -> Dict:
+    """Median hard_move latency for every ply of hard against hard games, every game starts with an empty cache"""
+    random.seed(seed)
+    latencies = {}
+    for _ in range(games):
+        game_field = create_field(engine)
+        table = TranspositionTable()
+        players = [AI(game_field, mark, 'hard', table, verbose=False) for mark in ('X', 'O')]
+        ply = 0
+        while not game_field.check_winner():
+            started = time.perf_counter()
+            players[ply % 2].make_move()
+            latencies.setdefault(ply, []).append(time.perf_counter() - started)
+            ply += 1
+    return {f'hard_move[ply {ply}]': metric(median(times)) for ply, times in sorted(latencies.items())}
+
+
+def bench_games(engine: str, levels: Tuple, games: int, seed: int) -> Dict:
+    """Full silent games per second for every pairing of levels, every pairing starts with an empty cache"""
+    results = {}
+    for player_1, player_2 in product(levels, repeat=2):
+        random.seed(f'{seed}:{player_1}:{player_2}')
+        TRANSPOSITION_TABLE.clear()
+        started = time.perf_counter()
+        for _ in range(games):
+            play_game(player_1, player_2, engine=engine)
+        results[f'games[{player_1} vs {player_2}]'] = metric(games / (time.perf_counter() - started), 'games/s')
+    return results
+
+
+def run_benchmarks(engine: str = 'list', positions: int = 2000, repeat: int = 5, hard_games: int = 5,
+                   games: int = 200, levels: Tuple = LEVELS, seed: int = 0) -> Dict:
+    """Runs every benchmark and returns the report written as JSON"""
+    metrics = {}
+    metrics.update(bench_primitives(engine, positions, repeat, seed))
+    metrics.update(bench_mini_max(engine, repeat))
+    metrics.update(bench_hard_move(engine, hard_games, seed))
+    metrics.update(bench_games(engine, levels, games, seed))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': engine,
+        'metrics': metrics,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns a line for every metric that is worse than the baseline by more than the threshold,
+    a threshold of 0.1 allows timings to grow and rates to drop by 10%.
+    Metrics missing from either report are skipped.
+    """
+    regressions = []
+    for name, current in report['metrics'].items():
+        if name not in baseline['metrics']:
+            continue
+        base = baseline['metrics'][name]['value']
+        value = current['value']
+        if current['unit'] in RATE_UNITS:
+            change = base / value - 1 if value else float('inf')
+        else:
+            change = value / base - 1 if base else 0
+        if change > threshold:
+            regressions.append(f'{name}: {base:.6g} -> {value:.6g} {current["unit"]} ({change:+.0%} worse)')
+    return regressions
+
+
+def format_report(report: Dict) -> str:
+    """Formats metrics as a table, one row per metric"""
+    return '\n'.join(f'{name:<32}{data["value"]:>14.6g} {data["unit"]}' for name, data in report['metrics'].items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON report to compare the results with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative regression, 0.1 is 10%%')
+    parser.add_argument('--engine', default='list', choices=FIELD_ENGINES)
+    parser.add_argument('--positions', type=int, default=2000, help='positions for the primitive timings')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per timing, the best one is reported')
+    parser.add_argument('--hard-games', type=int, default=5, help='hard against hard games for per ply latency')
+    parser.add_argument('--games', type=int, default=200, help='games per pairing')
+    parser.add_argument('--levels', nargs='+', default=LEVELS, choices=LEVELS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.engine, args.positions, args.repeat, args.hard_games, args.games,
+                            tuple(args.levels), args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        if regressions:
+            print('Regressions:')
+            print('\n'.join(regressions))
+            sys.exit(1)
+        print('No regressions')
+
+
+if __name__ == '__main__':
+    main()
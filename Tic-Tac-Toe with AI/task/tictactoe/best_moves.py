@@ -0,0 +1,133 @@
+"""
+Scores positions given as board strings without playing a game.
+A board is written like in tests.py: 9 cells of 'X', 'O' and '_' or ' ' for an empty cell, top row first,
+quotes are ignored. The side to move follows from the marks, X moves first.
+Moves are given as the coordinates a user types, column from the left and row from the bottom.
+"""
+import argparse
+import json
+import sys
+from multiprocessing import Pool
+from typing import Dict, Iterable, List
+
+from board import TicTacToeField, board_geometry
+from tictactoe import AI, ParametersError
+
+SIZE = 3
+
+
+def has_line(board: str, mark: str) -> bool:
+    return any(all(board[index] == mark for index in line) for line in board_geometry(SIZE, SIZE).lines)
+
+
+def normalize_board(board: str) -> str:
+    """
+    Returns the board with quotes removed and '_' for every empty cell.
+    Raises ParametersError if it is invalid or can not come up in a game.
+    """
+    board = board.replace('"', '').replace(' ', '_')
+    if len(board) != SIZE * SIZE or set(board) - set('XO_'):
+        raise ParametersError(f'Bad board: {board!r}')
+    if board.count('X') - board.count('O') not in (0, 1):
+        raise ParametersError(f'Impossible number of marks: {board!r}')
+    # the game ends with the first line, made by the side that moved last, so the other side never has one
+    x_to_move = board.count('X') == board.count('O')
+    if has_line(board, 'X' if x_to_move else 'O'):
+        raise ParametersError(f'Impossible line of the side to move: {board!r}')
+    return board
+
+
+def parse_board(board: str) -> TicTacToeField:
+    """Builds the field of a board string"""
+    board = normalize_board(board)
+    game_field = TicTacToeField()
+    for index, cell in enumerate(board):
+        if cell != '_':
+            game_field.turn = cell
+            game_field.move(divmod(index, SIZE))
+    game_field.turn = 'X' if board.count('X') == board.count('O') else 'O'
+    return game_field
+
+
+def user_coordinates(cell: tuple) -> str:
+    return f'{cell[1] + 1} {SIZE - cell[0]}'
+
+
+def evaluate_board(board: str) -> Dict:
+    """
+    Returns the move hard_move would make, its value and the values of all moves
+    for the side to move: 1 is a win, 0 a draw and -1 a loss with best play.
+    Unlike hard_move the empty board gets the first best move instead of a random one.
+    A finished game has no moves and the value of its result.
+    """
+    game_field = parse_board(board)
+    ai = AI(game_field, game_field.turn, 'hard', search='minimax', verbose=False)
+    result = game_field.check_winner()
+    if result:
+        return {'board': board, 'move': None, 'value': 0 if result == 'Draw' else -1, 'scores': {}}
+
+    scores = {}
+    best_score = -2
+    best_move = None
+    for move in game_field.get_empty_cells():
+        game_field.move(move)
+        score = ai.mini_max(False)
+        game_field.undo(move)
+        scores[move] = score
+        if score > best_score:
+            best_score = score
+            best_move = move
+    return {
+        'board': board,
+        'move': user_coordinates(best_move),
+        'value': best_score,
+        'scores': {user_coordinates(move): score for move, score in scores.items()},
+    }
+
+
+def evaluate_boards(boards: Iterable[str], workers: int = None, chunk_size: int = 256) -> List[Dict]:
+    """
+    Evaluates many boards, the result for every board is in the same order as the input.
+    An invalid board gets {'board': board, 'error': message} instead of a result.
+    Every distinct board string is checked once and every distinct position searched once,
+    the searches are split between worker processes whose transposition tables persist across boards.
+    """
+    boards = list(boards)
+    normalized = {}
+    for board in dict.fromkeys(boards):
+        try:
+            normalized[board] = normalize_board(board)
+        except ParametersError as error:
+            normalized[board] = error
+    unique = list(dict.fromkeys(board for board in normalized.values() if isinstance(board, str)))
+    if workers == 1:
+        results = list(map(evaluate_board, unique))
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(evaluate_board, unique, chunk_size)
+    by_board = dict(zip(unique, results))
+    return [
+        {'board': board, 'error': str(normalized[board])} if isinstance(normalized[board], ParametersError)
+        else by_board[normalized[board]]
+        for board in boards
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('boards', nargs='*', help='boards to score, read one per line from stdin if none given')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--chunk-size', type=int, default=256, help='boards a worker takes at a time')
+    args = parser.parse_args()
+
+    boards = args.boards or [line.strip('\n') for line in sys.stdin if line.strip()]
+    results = evaluate_boards(boards, args.workers, args.chunk_size)
+    for result in results:
+        print(json.dumps(result))
+    # every line is answered, the status tells whether some of them were errors
+    if any('error' in result for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+"""Board geometry and the game fields: the nested list field of the console game and the bitboard field"""
+from typing import Iterator, List, Optional, Tuple
+
+from renderers import TextRenderer
+
+# Cells of the symmetry lookup tables are transformed this many at a time
+SYMMETRY_CHUNK = 9
+# Largest board size a game can be started with: building the geometry takes about size ** 4 steps
+# and canonical_key packs the size into 8 bits
+MAX_SIZE = 16
+
+
+class BoardGeometry:
+    """Winning lines, masks and symmetries of a size x size board where win_length marks in a row win"""
+
+    def __init__(self, size: int, win_length: int):
+        self.size = size
+        self.win_length = win_length
+        self.cells_count = size * size
+        self.full_mask = (1 << self.cells_count) - 1
+        # coordinates of each cell index (row * size + column), so iterating cells does not build new tuples
+        self.cells = tuple(divmod(index, size) for index in range(self.cells_count))
+
+        # cell indexes of every winning line: rows, columns, diagonals and back diagonals
+        k = win_length
+        self.lines = tuple(
+            tuple((row + i * d_row) * size + col + i * d_col for i in range(k))
+            for d_row, d_col, rows, cols in (
+                (0, 1, range(size), range(size - k + 1)),
+                (1, 0, range(size - k + 1), range(size)),
+                (1, 1, range(size - k + 1), range(size - k + 1)),
+                (1, -1, range(size - k + 1), range(k - 1, size)),
+            )
+            for row, col in (
+                ((r, c) for c in cols for r in rows) if d_col == 0 else ((r, c) for r in rows for c in cols)
+            )
+        )
+        self.win_masks = tuple(sum(1 << cell for cell in line) for line in self.lines)
+        # indexes in lines of the lines passing through each cell, the only ones a move there can complete
+        self.cell_lines = tuple(
+            tuple(number for number, line in enumerate(self.lines) if cell in line) for cell in range(self.cells_count)
+        )
+        self.cell_masks = tuple(tuple(self.win_masks[line] for line in lines) for lines in self.cell_lines)
+
+        middle = {(size - 1) // 2, size // 2}
+        self.centre_mask = sum(1 << (row * size + col) for row in middle for col in middle)
+        self.corners_mask = sum(1 << (row * size + col) for row in (0, size - 1) for col in (0, size - 1))
+
+        # the 8 rotations/reflections of the board as cell index permutations: cell i moves to permutation[i]
+        n = size - 1
+        self.symmetries = tuple(
+            tuple(new_row * size + new_col for new_row, new_col in (transform(row, col) for row, col in self.cells))
+            for transform in (
+                lambda r, c: (r, c), lambda r, c: (c, n - r), lambda r, c: (n - r, n - c), lambda r, c: (n - c, r),
+                lambda r, c: (r, n - c), lambda r, c: (n - r, c), lambda r, c: (c, r), lambda r, c: (n - c, n - r),
+            )
+        )
+        # symmetry_tables[s][chunk][bits] is the chunk of the mask with given bits transformed by symmetry s
+        self.symmetry_tables = tuple(
+            tuple(
+                tuple(
+                    sum(1 << permutation[start + i] for i in range(SYMMETRY_CHUNK) if bits >> i & 1)
+                    for bits in range(1 << min(SYMMETRY_CHUNK, self.cells_count - start))
+                )
+                for start in range(0, self.cells_count, SYMMETRY_CHUNK)
+            )
+            for permutation in self.symmetries
+        )
+
+    def transform(self, mask: int, symmetry: int) -> int:
+        """Applies one of the 8 symmetries to a mask of cells"""
+        result = 0
+        shift = 0
+        for table in self.symmetry_tables[symmetry]:
+            result |= table[mask >> shift & (len(table) - 1)]
+            shift += SYMMETRY_CHUNK
+        return result
+
+
+_geometries = {}
+
+
+def board_geometry(size: int = 3, win_length: int = 3) -> BoardGeometry:
+    """Returns the geometry of the board, built once per size and win length"""
+    if (size, win_length) not in _geometries:
+        _geometries[size, win_length] = BoardGeometry(size, win_length)
+    return _geometries[size, win_length]
+
+
+class TicTacToeField:
+    """Game field"""
+
+    def __init__(self, size: int = 3, win_length: int = 3):
+        self.size = size
+        self.win_length = win_length
+        self.geometry = board_geometry(size, win_length)
+        self.field = [[' ' for _ in range(size)] for _ in range(size)]
+        self.turn = 'X'
+        # marks of each side on every line, the number of complete lines and filled cells, kept by move/undo
+        self.line_counts = {'X': [0] * len(self.geometry.lines), 'O': [0] * len(self.geometry.lines)}
+        self.complete_lines = {'X': 0, 'O': 0}
+        self.filled = 0
+        # occupied cells of each side as bitmasks, empty cells are the ones set in neither
+        self.bits = {'X': 0, 'O': 0}
+
+    def __getstate__(self) -> dict:
+        """Pickles the field without its geometry, which is shared and rebuilt on unpickling"""
+        state = self.__dict__.copy()
+        del state['geometry']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.geometry = board_geometry(self.size, self.win_length)
+
+    def print_game_field(self):
+        """Prints game_field field to console"""
+        TextRenderer().render(self)
+
+    def get_empty_cells(self) -> List[Tuple]:
+        """Finds all empty cells and returns it"""
+        return list(self.iter_empty_cells())
+
+    def iter_empty_cells(self) -> Iterator[Tuple]:
+        """Iterates over empty cells in the same order as get_empty_cells without building a list"""
+        x_bits, o_bits = self.bitmasks()
+        cells = self.geometry.cells
+        empty = self.geometry.full_mask & ~(x_bits | o_bits)
+        while empty:
+            lowest = empty & -empty
+            yield cells[lowest.bit_length() - 1]
+            empty ^= lowest
+
+    @property
+    def num_empty(self) -> int:
+        """Number of empty cells"""
+        return self.geometry.cells_count - self.filled
+
+    def is_empty(self, coordinates: Tuple[int, int]) -> bool:
+        """Checks if the cell is empty"""
+        x_bits, o_bits = self.bitmasks()
+        return not (x_bits | o_bits) >> (coordinates[0] * self.size + coordinates[1]) & 1
+
+    def move(self, coordinates: Tuple[int, int]):
+        """Makes a move"""
+        x = coordinates[0]
+        y = coordinates[1]
+        mark = self.turn
+        self.field[x][y] = mark
+        index = x * self.size + y
+        # only the lines through the new mark can be completed by it
+        counts = self.line_counts[mark]
+        for line in self.geometry.cell_lines[index]:
+            counts[line] += 1
+            if counts[line] == self.win_length:
+                self.complete_lines[mark] += 1
+        self.bits[mark] |= 1 << index
+        self.filled += 1
+        self.next_turn()
+
+    def undo(self, coordinates: Tuple[int, int]):
+        """Cancels the move"""
+        x = coordinates[0]
+        y = coordinates[1]
+        mark = self.field[x][y]
+        self.field[x][y] = ' '
+        index = x * self.size + y
+        counts = self.line_counts[mark]
+        for line in self.geometry.cell_lines[index]:
+            if counts[line] == self.win_length:
+                self.complete_lines[mark] -= 1
+            counts[line] -= 1
+        self.bits[mark] &= ~(1 << index)
+        self.filled -= 1
+        self.next_turn()
+
+    def next_turn(self):
+        """Ends the current player’s turn and setups state for the next."""
+        self.turn = 'X' if self.turn == 'O' else 'O'
+
+    def check_winner(self) -> str:
+        """Check who wins"""
+        if self.complete_lines['O']:
+            return 'O'
+        elif self.complete_lines['X']:
+            return 'X'
+        elif self.filled == self.geometry.cells_count:
+            return 'Draw'
+
+    def get_threat(self, mark: str) -> Optional[Tuple]:
+        """Finds the first line with all but one given marks and one empty cell, returns that empty cell"""
+        own = self.line_counts[mark]
+        rival = self.line_counts['X' if mark == 'O' else 'O']
+        for line, cells in enumerate(self.geometry.lines):
+            if own[line] == self.win_length - 1 and not rival[line]:
+                for cell in cells:
+                    x, y = self.geometry.cells[cell]
+                    if self.field[x][y] == ' ':
+                        return x, y
+
+    def bitmasks(self) -> Tuple[int, int]:
+        """Returns X and O cells as bitmasks, bit row * size + column set for an occupied cell"""
+        return self.bits['X'], self.bits['O']
+
+    def fork(self) -> 'BitboardField':
+        """
+        Returns an independent snapshot of the position for searching.
+        The snapshot is a BitboardField, so only a few integers are copied whatever the board size.
+        """
+        snapshot = BitboardField.__new__(BitboardField)
+        snapshot.size = self.size
+        snapshot.win_length = self.win_length
+        snapshot.geometry = self.geometry
+        snapshot.x_bits, snapshot.o_bits = self.bitmasks()
+        snapshot.turn = self.turn
+        snapshot.filled = self.filled
+        snapshot.complete_lines = dict(self.complete_lines)
+        return snapshot
+
+
+class BitboardField(TicTacToeField):
+    """Game field stored as two bitmasks, one bit per cell for each side"""
+
+    def __init__(self, size: int = 3, win_length: int = 3):
+        self.size = size
+        self.win_length = win_length
+        self.geometry = board_geometry(size, win_length)
+        self.x_bits = 0
+        self.o_bits = 0
+        self.turn = 'X'
+        self.filled = 0
+        self.complete_lines = {'X': 0, 'O': 0}
+
+    @property
+    def field(self) -> List[List[str]]:
+        """Builds the nested list view of the board used for rendering"""
+        return [[self._cell(row * self.size + col) for col in range(self.size)] for row in range(self.size)]
+
+    def _cell(self, index: int) -> str:
+        """Returns the mark in the cell with given index"""
+        bit = 1 << index
+        if self.x_bits & bit:
+            return 'X'
+        elif self.o_bits & bit:
+            return 'O'
+        return ' '
+
+    def move(self, coordinates: Tuple[int, int]):
+        """Makes a move"""
+        index = coordinates[0] * self.size + coordinates[1]
+        if self.turn == 'X':
+            self.x_bits |= 1 << index
+            bits = self.x_bits
+        else:
+            self.o_bits |= 1 << index
+            bits = self.o_bits
+        # only the lines through the new mark can be completed by it
+        for mask in self.geometry.cell_masks[index]:
+            if bits & mask == mask:
+                self.complete_lines[self.turn] += 1
+        self.filled += 1
+        self.next_turn()
+
+    def undo(self, coordinates: Tuple[int, int]):
+        """Cancels the move"""
+        index = coordinates[0] * self.size + coordinates[1]
+        mark = 'X' if self.x_bits >> index & 1 else 'O'
+        bits = self.x_bits if mark == 'X' else self.o_bits
+        for mask in self.geometry.cell_masks[index]:
+            if bits & mask == mask:
+                self.complete_lines[mark] -= 1
+        self.x_bits &= ~(1 << index)
+        self.o_bits &= ~(1 << index)
+        self.filled -= 1
+        self.next_turn()
+
+    def get_threat(self, mark: str) -> Optional[Tuple]:
+        """Finds the first line with all but one given marks and one empty cell, returns that empty cell"""
+        own, rival = (self.x_bits, self.o_bits) if mark == 'X' else (self.o_bits, self.x_bits)
+        for mask in self.geometry.win_masks:
+            free = mask & ~own
+            if not rival & mask and free and not free & (free - 1):
+                return self.geometry.cells[free.bit_length() - 1]
+
+    def bitmasks(self) -> Tuple[int, int]:
+        """Returns X and O cells as bitmasks, bit row * size + column set for an occupied cell"""
+        return self.x_bits, self.o_bits
+
+
+def canonical_key(game_field: TicTacToeField) -> int:
+    """
+    Board hash shared by all 8 rotations/reflections of the position.
+    It also includes the side to move and the board size and win length, so boards of different games never collide.
+    """
+    geometry = game_field.geometry
+    x_bits, o_bits = game_field.bitmasks()
+    if len(geometry.symmetry_tables[0]) == 1:
+        key = min(table[x_bits] | table[o_bits] << 9 for table, in geometry.symmetry_tables)
+    else:
+        key = min(
+            geometry.transform(x_bits, symmetry) | geometry.transform(o_bits, symmetry) << geometry.cells_count
+            for symmetry in range(8)
+        )
+    return ((key << 1 | (game_field.turn == 'O')) << 8 | geometry.size) << 8 | geometry.win_length
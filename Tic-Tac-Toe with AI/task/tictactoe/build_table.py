@@ -0,0 +1,46 @@
+"""Regenerates the solved position table used by the hard AI in 'table' search mode and checks it against mini_max"""
+import argparse
+
+from board import TicTacToeField
+from positions import reachable_positions
+from tables import SolvedTable
+from tictactoe import AI
+
+
+def verify(table: SolvedTable) -> int:
+    """Compares the table with a live mini_max search, returns the number of mismatching positions"""
+    mismatches = 0
+    checked = 0
+    for game_field in reachable_positions(TicTacToeField()):
+        if game_field.check_winner():
+            continue
+        ai = AI(game_field, game_field.turn, 'hard', transposition_table=None)
+        scores = {}
+        for move in game_field.iter_empty_cells():
+            game_field.move(move)
+            scores[move] = ai.mini_max(False)
+            game_field.undo(move)
+        value = max(scores.values())
+        moves = [move for move, score in scores.items() if score == value]
+        if table.lookup(game_field) != (value, moves):
+            mismatches += 1
+            print(f'Mismatch in {game_field.field}: table {table.lookup(game_field)}, mini_max {(value, moves)}')
+        checked += 1
+    print(f'Checked {checked} positions, {mismatches} mismatches')
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=SolvedTable.DEFAULT_PATH, help='table file to write')
+    parser.add_argument('--verify', action='store_true', help='check every position against mini_max')
+    args = parser.parse_args()
+
+    SolvedTable(SolvedTable.build()).save(args.output)
+    print(f'Table written to {args.output}')
+    if args.verify and verify(SolvedTable.load(args.output)):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Move counters and move time stats of the console game, printed with --stats"""
+import bisect
+import math
+import time
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from board import TicTacToeField
+    from tictactoe import AI
+
+
+class Instrumentation:
+    """
+    Counts field moves and undos and times AI moves, grouped by AI level.
+    While disabled nothing is patched, so games run exactly the uninstrumented code.
+    Enabling replaces the move methods of the field classes and AI.make_move with counting wrappers,
+    searches running in other processes (mcts with several workers) are not counted.
+    The classes to patch are given when it is made, tictactoe.INSTRUMENTATION patches its fields and AI.
+    """
+
+    # upper bounds of the move time histogram buckets in seconds, the last bucket takes everything slower
+    HISTOGRAM_BOUNDS = tuple(10 ** (exponent / 2) for exponent in range(-10, 3))
+
+    def __init__(self, field_classes: Tuple[type, ...], ai_class: type):
+        self.field_classes = field_classes
+        self.ai_class = ai_class
+        self.enabled = False
+        self._originals = {}
+        self.reset()
+
+    def reset(self):
+        """Clears all counters"""
+        self.field_moves = 0
+        self.field_undos = 0
+        self.max_filled = 0
+        self.levels = {}
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for field_class in self.field_classes:
+            self._originals[field_class] = field_class.__dict__['move'], field_class.__dict__['undo']
+            field_class.move = self._counted_move(field_class.move)
+            field_class.undo = self._counted_undo(field_class.undo)
+        ai_class = self.ai_class
+        self._originals[ai_class] = ai_class.make_move
+        ai_class.make_move = self._timed_make_move(ai_class.make_move)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for field_class in self.field_classes:
+            field_class.move, field_class.undo = self._originals.pop(field_class)
+        self.ai_class.make_move = self._originals.pop(self.ai_class)
+
+    def _counted_move(self, move):
+        def counted_move(game_field: 'TicTacToeField', coordinates: Tuple[int, int]):
+            self.field_moves += 1
+            move(game_field, coordinates)
+            if game_field.filled > self.max_filled:
+                self.max_filled = game_field.filled
+        return counted_move
+
+    def _counted_undo(self, undo):
+        def counted_undo(game_field: 'TicTacToeField', coordinates: Tuple[int, int]):
+            self.field_undos += 1
+            undo(game_field, coordinates)
+        return counted_undo
+
+    def _timed_make_move(self, make_move):
+        def timed_make_move(ai: 'AI'):
+            table = ai.transposition_table
+            hits, misses = (table.hits, table.misses) if table is not None else (0, 0)
+            filled = ai.game_field.filled
+            self.max_filled = filled
+            started = time.perf_counter()
+            make_move(ai)
+            elapsed = time.perf_counter() - started
+            level = self.levels.setdefault(ai.difficult, {
+                'moves': 0, 'time': 0.0, 'nodes': 0, 'max_depth': 0, 'cache_hits': 0, 'cache_misses': 0,
+                'histogram': [0] * (len(self.HISTOGRAM_BOUNDS) + 1),
+            })
+            level['moves'] += 1
+            level['time'] += elapsed
+            if ai.difficult == 'hard':
+                level['nodes'] += ai.nodes
+            # the AI's own move counts as one ply of depth
+            level['max_depth'] = max(level['max_depth'], self.max_filled - filled)
+            if table is not None:
+                level['cache_hits'] += table.hits - hits
+                level['cache_misses'] += table.misses - misses
+            level['histogram'][bisect.bisect_left(self.HISTOGRAM_BOUNDS, elapsed)] += 1
+        return timed_make_move
+
+    def stats(self) -> dict:
+        """Returns field counters and per level move counters, every histogram count goes with HISTOGRAM_BOUNDS"""
+        return {
+            'field_moves': self.field_moves,
+            'field_undos': self.field_undos,
+            'histogram_bounds': self.HISTOGRAM_BOUNDS,
+            'levels': {level: dict(counters, histogram=list(counters['histogram']))
+                       for level, counters in self.levels.items()},
+        }
+
+    def summary(self) -> str:
+        """Formats the stats as text"""
+        lines = [f'Field moves: {self.field_moves}, undos: {self.field_undos}']
+        for level, counters in self.levels.items():
+            lines.append(f'Level "{level}": {counters["moves"]} moves in {counters["time"]:.3f} s, '
+                         f'{counters["nodes"]} nodes, max depth {counters["max_depth"]}, '
+                         f'cache hits {counters["cache_hits"]}, misses {counters["cache_misses"]}')
+            lower = 0
+            for bound, count in zip(self.HISTOGRAM_BOUNDS + (math.inf,), counters['histogram']):
+                if count:
+                    lines.append(f'  {lower * 1000:>9.3f} - {bound * 1000:>9.3f} ms: {count}')
+                lower = bound
+        return '\n'.join(lines)
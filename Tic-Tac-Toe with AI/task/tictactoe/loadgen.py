@@ -0,0 +1,73 @@
+"""Opens many concurrent sessions against server.py, plays random user moves and reports throughput and latency"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+PROMPTS = ('Input command:', 'Enter the coordinates:')
+
+
+async def read_until_prompt(reader: asyncio.StreamReader) -> List[str]:
+    """Reads server lines up to and including the next prompt"""
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise EOFError
+        lines.append(line.decode().rstrip('\n'))
+        if lines[-1] in PROMPTS:
+            return lines
+
+
+def empty_cells(lines: List[str], size: int) -> List[str]:
+    """Coordinates of the empty cells of the last board in the output, in the 'x y' notation"""
+    rows = [line for line in lines if line.startswith('|') and line.endswith('|')][-size:]
+    return [f'{col + 1} {size - row}' for row, line in enumerate(rows) for col in range(size)
+            if line[2 + 2 * col] == ' ']
+
+
+async def client(host: str, port: int, games: int, opponent: str, size: int, latencies: List[float]):
+    reader, writer = await asyncio.open_connection(host, port)
+    await read_until_prompt(reader)
+    for _ in range(games):
+        writer.write(f'start user {opponent} {size}\n'.encode())
+        lines = await read_until_prompt(reader)
+        while lines[-1] == 'Enter the coordinates:':
+            writer.write((random.choice(empty_cells(lines, size)) + '\n').encode())
+            started = time.perf_counter()
+            lines = await read_until_prompt(reader)
+            latencies.append(time.perf_counter() - started)
+    writer.write(b'exit\n')
+    await writer.drain()
+    writer.close()
+
+
+async def run(args) -> List[float]:
+    latencies = []
+    await asyncio.gather(*(client(args.host, args.port, args.games, args.opponent, args.size, latencies)
+                           for _ in range(args.sessions)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=100, help='concurrent connections')
+    parser.add_argument('--games', type=int, default=5, help='games per session')
+    parser.add_argument('--opponent', default='hard', choices=('easy', 'medium', 'hard', 'mcts'))
+    parser.add_argument('--size', type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    latencies = sorted(asyncio.run(run(args)))
+    elapsed = time.perf_counter() - started
+    # every round trip is a user move and the reply, unless the user move ended the game
+    print(f'{len(latencies)} round trips in {elapsed:.2f} s, {len(latencies) / elapsed:.0f} moves per second')
+    print(f'latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
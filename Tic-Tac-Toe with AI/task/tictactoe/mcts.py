@@ -0,0 +1,79 @@
+"""Monte Carlo Tree Search of the mcts level, runs on a field of its own in this or a worker process"""
+import math
+import random
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from board import TicTacToeField
+
+
+class MCTSNode:
+    """Node of the Monte Carlo search tree, wins are counted for the player who made the move leading here"""
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move: Optional[Tuple], parent: Optional['MCTSNode'], untried: List[Tuple]):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        """Picks the child with the highest upper confidence bound (UCT)"""
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+def mcts_search(game_field: 'TicTacToeField', playouts: Optional[int], time_budget: float, seed: int,
+                exploration: float = 1.4) -> Tuple[dict, int]:
+    """
+    Runs UCT from the position with random playouts, until playouts are done or, when playouts is None,
+    the time budget runs out. The field is restored afterwards.
+    Returns visits and wins of every root move and the number of playouts made.
+    """
+    rng = random.Random(seed)
+    root = MCTSNode(None, None, game_field.get_empty_cells())
+    deadline = time.perf_counter() + time_budget
+    done = 0
+    while (done < playouts) if playouts is not None else (not done or time.perf_counter() < deadline):
+        node = root
+        path = []
+        # selection
+        while not node.untried and node.children:
+            node = node.select_child(exploration)
+            game_field.move(node.move)
+            path.append(node.move)
+        # expansion
+        if node.untried and not game_field.check_winner():
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            game_field.move(move)
+            path.append(move)
+            child = MCTSNode(move, node, [] if game_field.check_winner() else game_field.get_empty_cells())
+            node.children.append(child)
+            node = child
+        # random playout
+        playout = []
+        while not game_field.check_winner():
+            move = next(islice(game_field.iter_empty_cells(), rng.randrange(game_field.num_empty), None))
+            game_field.move(move)
+            playout.append(move)
+        winner = game_field.check_winner()
+        for move in reversed(playout):
+            game_field.undo(move)
+        # backpropagation, the mark that made node.move is the opposite of the side to move after it
+        mover = game_field.turn
+        for move in reversed(path):
+            mover = 'X' if mover == 'O' else 'O'
+            node.visits += 1
+            node.wins += 1 if winner == mover else 0.5 if winner == 'Draw' else 0
+            node = node.parent
+            game_field.undo(move)
+        root.visits += 1
+        done += 1
+    return {child.move: (child.visits, child.wins) for child in root.children}, done
@@ -0,0 +1,85 @@
+"""Pondering: a hard AI searches its answers to the likely moves of its user opponent while the user types"""
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from board import TicTacToeField
+    from tictactoe import AI
+
+
+class PonderStats:
+    """Ponder hits and the search time they saved, collected over all games of the process"""
+
+    def __init__(self):
+        self.user_moves = 0
+        self.hits = 0
+        self.searches = 0
+        self.saved = 0.0
+
+    def summary(self) -> str:
+        rate = self.hits / self.user_moves if self.user_moves else 0.0
+        per_hit = self.saved / self.hits * 1000 if self.hits else 0.0
+        return (f'Pondering: {self.hits} hits of {self.user_moves} user moves ({rate:.0%}), '
+                f'{self.searches} answers searched ahead, {self.saved:.3f} s saved ({per_hit:.1f} ms per hit)')
+
+
+class Ponderer:
+    """
+    Searches the answers of a hard AI to the likely moves of its user opponent on a background thread
+    while the user types. The moves are tried in the pruning order of the user's side: wins, blocks, centre...
+    A search that is running when the user's move arrives is finished first, it warms the transposition table
+    even if it was for another move. A hit answers with the searched move at once, a miss searches as usual.
+    """
+
+    def __init__(self, ai: 'AI', stats: PonderStats):
+        self.ai = ai
+        self.stats = stats
+        self.answers = {}
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Starts pondering the AI's field, to be called when the user is about to move"""
+        self.answers = {}
+        self.stopped.clear()
+        game_field = self.ai.game_field.fork()
+        self.thread = threading.Thread(target=self._ponder, args=(game_field,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Waits for the search in progress and stops pondering, e.g. when the user's move ended the game"""
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+    def _ponder(self, game_field: 'TicTacToeField'):
+        for move in self.ai._ordered_moves(game_field):
+            if self.stopped.is_set():
+                return
+            game_field.move(move)
+            if not game_field.check_winner():
+                started = time.perf_counter()
+                answer = self.ai.best_move(game_field)
+                self.answers[game_field.bitmasks()] = answer, time.perf_counter() - started
+                self.stats.searches += 1
+            game_field.undo(move)
+
+    def answer(self, game_field: 'TicTacToeField') -> Optional[Tuple]:
+        """Stops pondering and returns the searched answer to the position if there is one"""
+        if self.thread is None:
+            return None
+        started = time.perf_counter()
+        self.stop()
+        self.stats.user_moves += 1
+        answer = self.answers.pop(game_field.bitmasks(), None)
+        self.answers = {}
+        if answer is None:
+            return None
+        move, search_time = answer
+        self.stats.hits += 1
+        # waiting for a search of this very move still saves the part done while the user typed
+        self.stats.saved += max(search_time - (time.perf_counter() - started), 0.0)
+        return move
@@ -0,0 +1,15 @@
+"""Process pools of the searches, one per number of workers and initializer, started on first use"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Tuple
+
+_process_pools = {}
+
+
+def process_pool(workers: int, initializer: Callable = None, initargs: Tuple = ()) -> ProcessPoolExecutor:
+    """
+    Returns the process pool of that size whose workers were started with the initializer,
+    started on first use and reused afterwards. The initargs of the first call are the ones used.
+    """
+    if (workers, initializer) not in _process_pools:
+        _process_pools[workers, initializer] = ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs)
+    return _process_pools[workers, initializer]
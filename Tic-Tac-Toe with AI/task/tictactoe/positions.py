@@ -0,0 +1,180 @@
+"""
+Enumerates every position reachable from a given one without remembering the positions already seen.
+Each position has one canonical parent: the position without the lowest cell of the last mover's marks
+that leaves no finished game behind (marks of the starting position are never removed).
+A move is followed only when it leads to a position whose canonical parent is the current one,
+so every position is met exactly once and only the positions on the path (depth first)
+or the current layer (breadth first) are held in memory.
+With symmetry deduplication positions are compared by the symmetries of the board that keep the starting
+position in place, one position of every group of rotations and reflections is yielded.
+"""
+import argparse
+import time
+from collections import Counter
+from typing import Iterator, List, Tuple
+
+from board import BitboardField, TicTacToeField
+
+ORDERS = ('dfs', 'bfs')
+
+
+class EnumerationStats:
+    """Counts of the enumerated positions by depth (moves made since the starting position), result and side to move"""
+
+    def __init__(self):
+        self.total = 0
+        self.by_depth = Counter()
+        self.by_result = Counter()
+        self.by_turn = Counter()
+
+    def add(self, game_field: TicTacToeField, depth: int):
+        self.total += 1
+        self.by_depth[depth] += 1
+        self.by_result[game_field.check_winner() or 'Ongoing'] += 1
+        self.by_turn[game_field.turn] += 1
+
+    def summary(self) -> str:
+        lines = [f'{self.total} positions']
+        lines.append('By depth: ' + ', '.join(f'{depth}: {count}' for depth, count in sorted(self.by_depth.items())))
+        lines.append('By result: ' + ', '.join(f'{result}: {count}' for result, count in self.by_result.items()))
+        turns = sorted(self.by_turn.items())
+        lines.append('By side to move: ' + ', '.join(f'{turn}: {count}' for turn, count in turns))
+        return '\n'.join(lines)
+
+
+class PositionEnumerator:
+    """Walks the positions reachable from the starting field, see the module docstring"""
+
+    def __init__(self, game_field: TicTacToeField, symmetry: bool = False):
+        self.geometry = game_field.geometry
+        self.start = game_field.bitmasks()
+        self.start_turn = game_field.turn
+        self.start_filled = game_field.filled
+        x_bits, o_bits = self.start
+        self.symmetries = [0]
+        if symmetry:
+            self.symmetries = [
+                number for number in range(8)
+                if (self.geometry.transform(x_bits, number), self.geometry.transform(o_bits, number)) == self.start
+            ]
+
+    def won(self, bits: int) -> bool:
+        return any(bits & mask == mask for mask in self.geometry.win_masks)
+
+    def canonical(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        """The least form of the position under the symmetries in use, the position itself without symmetry"""
+        if len(self.symmetries) == 1:
+            return position
+        x_bits, o_bits = position
+        transform = self.geometry.transform
+        return min((transform(x_bits, number), transform(o_bits, number)) for number in self.symmetries)
+
+    def turn(self, position: Tuple[int, int]) -> int:
+        """0 if X moves next in the position, 1 if O does"""
+        marks = bin(position[0] | position[1]).count('1') - self.start_filled
+        return (self.start_turn == 'O') ^ (marks % 2)
+
+    def parent(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        """The canonical parent of a position with more marks than the starting one"""
+        mover = 1 - self.turn(position)
+        bits = position[mover] & ~self.start[mover]
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            parent = list(position)
+            parent[mover] ^= low
+            if not self.won(parent[0]) and not self.won(parent[1]):
+                return tuple(parent)
+        raise ValueError('Position is not reachable from the starting one')
+
+    def children(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Children of the position whose canonical parent it is, one of every symmetric group"""
+        x_bits, o_bits = position
+        if self.won(x_bits) or self.won(o_bits):
+            return []
+        mover = self.turn(position)
+        empty = ~(x_bits | o_bits) & self.geometry.full_mask
+        canonical_position = self.canonical(position)
+        children = {}
+        while empty:
+            low = empty & -empty
+            empty ^= low
+            child = list(position)
+            child[mover] |= low
+            child = tuple(child)
+            canonical_child = self.canonical(child)
+            if canonical_child in children:
+                continue
+            if self.canonical(self.parent(canonical_child)) == canonical_position:
+                children[canonical_child] = child
+        return list(children.values())
+
+    def field(self, position: Tuple[int, int]) -> BitboardField:
+        """Builds a field of the position"""
+        game_field = BitboardField(self.geometry.size, self.geometry.win_length)
+        game_field.x_bits, game_field.o_bits = position
+        game_field.filled = bin(position[0] | position[1]).count('1')
+        for mark, bits in zip('XO', position):
+            game_field.complete_lines[mark] = sum(bits & mask == mask for mask in self.geometry.win_masks)
+        game_field.turn = 'XO'[self.turn(position)]
+        return game_field
+
+    def dfs(self) -> Iterator[Tuple[int, int]]:
+        # one iterator of children per ply on the path
+        stack = [iter([self.start])]
+        while stack:
+            position = next(stack[-1], None)
+            if position is None:
+                stack.pop()
+                continue
+            yield position
+            stack.append(iter(self.children(position)))
+
+    def bfs(self) -> Iterator[Tuple[int, int]]:
+        layer = [self.start]
+        while layer:
+            next_layer = []
+            for position in layer:
+                yield position
+                next_layer.extend(self.children(position))
+            layer = next_layer
+
+
+def reachable_positions(game_field: TicTacToeField, order: str = 'dfs', symmetry: bool = False,
+                        stats: EnumerationStats = None) -> Iterator[BitboardField]:
+    """
+    Yields a new field for every position reachable from the given one, the given one included.
+    Breadth first order yields positions by number of marks. Stats, if given, are updated as positions are yielded.
+    """
+    if order not in ORDERS:
+        raise ValueError(f'Order should be one of {ORDERS}')
+    enumerator = PositionEnumerator(game_field, symmetry)
+    for position in getattr(enumerator, order)():
+        position_field = enumerator.field(position)
+        if stats is not None:
+            stats.add(position_field, position_field.filled - enumerator.start_filled)
+        yield position_field
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=None, help='the board size by default')
+    parser.add_argument('--order', default='dfs', choices=ORDERS)
+    parser.add_argument('--symmetry', action='store_true', help='count symmetric positions once')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many positions')
+    args = parser.parse_args()
+
+    game_field = TicTacToeField(args.size, args.win_length or args.size)
+    stats = EnumerationStats()
+    started = time.perf_counter()
+    for number, _ in enumerate(reachable_positions(game_field, args.order, args.symmetry, stats), 1):
+        if number == args.limit:
+            break
+    elapsed = time.perf_counter() - started
+    print(stats.summary())
+    print(f'{elapsed:.2f} s, {stats.total / elapsed:.0f} positions per second')
+
+
+if __name__ == '__main__':
+    main()
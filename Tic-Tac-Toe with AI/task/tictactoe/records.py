@@ -0,0 +1,180 @@
+"""
+Stores finished games in an append-only binary log and streams them back.
+The file starts with MAGIC, then every game is a RECORD header (board size, win length, both player levels,
+result and the 16-bit number of moves) followed by the moves as cell indices row * size + column.
+Boards of up to 16 cells pack two moves per byte, high nibble first, larger boards take a byte per move.
+"""
+import argparse
+import random
+import struct
+from collections import Counter, namedtuple
+from typing import Dict, Iterator, List, Tuple
+
+from board import MAX_SIZE, TicTacToeField
+from tictactoe import GAME_CONFIGURATION, GameFactory
+
+MAGIC = b'TTR2'
+RECORD = struct.Struct('<5BH')
+RESULTS = ('X', 'O', 'Draw')
+
+GameRecord = namedtuple('GameRecord', 'player_1 player_2 size win_length result moves')
+
+
+def pack_moves(moves: List[int], cells_count: int) -> bytes:
+    if cells_count > 16:
+        return bytes(moves)
+    padded = moves + [0] * (len(moves) % 2)
+    return bytes(padded[i] << 4 | padded[i + 1] for i in range(0, len(padded), 2))
+
+
+def unpack_moves(data: bytes, count: int, cells_count: int) -> List[int]:
+    if cells_count > 16:
+        return list(data)
+    moves = []
+    for byte in data:
+        moves.append(byte >> 4)
+        moves.append(byte & 15)
+    return moves[:count]
+
+
+def moves_length(count: int, cells_count: int) -> int:
+    """Bytes taken by count packed moves"""
+    return count if cells_count > 16 else (count + 1) // 2
+
+
+class GameWriter:
+    """Appends game records to a file, the magic is written when the file is new"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'ab')
+        if not self.file.tell():
+            self.file.write(MAGIC)
+
+    def write(self, record: GameRecord):
+        if record.size > MAX_SIZE:
+            raise ValueError(f'Boards larger than {MAX_SIZE}x{MAX_SIZE} can not be recorded')
+        cells_count = record.size ** 2
+        self.file.write(RECORD.pack(
+            record.size, record.win_length, GAME_CONFIGURATION.index(record.player_1),
+            GAME_CONFIGURATION.index(record.player_2), RESULTS.index(record.result), len(record.moves),
+        ))
+        self.file.write(pack_moves(list(record.moves), cells_count))
+
+    def recorder(self) -> 'GameRecorder':
+        """Returns a recorder of one game, to be passed to GameFactory"""
+        return GameRecorder(self)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> 'GameWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecorder:
+    """Collects the moves GameFactory reports and writes the game once it is over"""
+
+    def __init__(self, writer: GameWriter):
+        self.writer = writer
+
+    def begin(self, player_1: str, player_2: str, game_field: TicTacToeField):
+        self.players = player_1, player_2
+        self.moves = []
+
+    def record(self, coordinates: Tuple[int, int], game_field: TicTacToeField):
+        self.moves.append(coordinates[0] * game_field.size + coordinates[1])
+        result = game_field.check_winner()
+        if result:
+            self.writer.write(GameRecord(*self.players, game_field.size, game_field.win_length, result,
+                                         tuple(self.moves)))
+
+
+def read_games(path: str) -> Iterator[GameRecord]:
+    """Yields the games of the file one by one, only the current record is in memory"""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a game record file')
+        while True:
+            header = file.read(RECORD.size)
+            if not header:
+                return
+            if len(header) < RECORD.size:
+                raise ValueError(f'{path} ends in the middle of a record')
+            size, win_length, player_1, player_2, result, count = RECORD.unpack(header)
+            cells_count = size * size
+            data = file.read(moves_length(count, cells_count))
+            if len(data) < moves_length(count, cells_count):
+                raise ValueError(f'{path} ends in the middle of a record')
+            yield GameRecord(GAME_CONFIGURATION[player_1], GAME_CONFIGURATION[player_2], size, win_length,
+                             RESULTS[result], tuple(unpack_moves(data, count, cells_count)))
+
+
+def replay(record: GameRecord) -> Iterator[TicTacToeField]:
+    """Replays the game into a new field, yielding the field after every move"""
+    game_field = TicTacToeField(record.size, record.win_length)
+    for index in record.moves:
+        game_field.move(divmod(index, record.size))
+        yield game_field
+
+
+def opening_distribution(path: str, size: int = 3) -> Counter:
+    """Counts games on boards of the given size by their first move"""
+    return Counter(divmod(record.moves[0], size) for record in read_games(path) if record.size == size)
+
+
+def results_by_first_move(path: str, size: int = 3) -> Dict[Tuple, Counter]:
+    """Counts results of the games on boards of the given size for every first move"""
+    results = {}
+    for record in read_games(path):
+        if record.size == size:
+            results.setdefault(divmod(record.moves[0], size), Counter())[record.result] += 1
+    return results
+
+
+def record_games(path: str, player_1: str, player_2: str, games: int, size: int = 3, win_length: int = 3):
+    """Plays AI games silently and appends them to the file"""
+    with GameWriter(path) as writer:
+        for _ in range(games):
+            game_field = TicTacToeField(size, win_length)
+            game = GameFactory(player_1, player_2, game_field, recorder=writer.recorder(), verbose=False)
+            while not game_field.check_winner():
+                game.next_move()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='play AI games and append them to the file')
+    record.add_argument('path')
+    record.add_argument('player_1', choices=GAME_CONFIGURATION[1:])
+    record.add_argument('player_2', choices=GAME_CONFIGURATION[1:])
+    record.add_argument('--games', type=int, default=1000)
+    record.add_argument('--seed', type=int, default=None)
+    record.add_argument('--size', type=int, default=3)
+    record.add_argument('--win-length', type=int, default=3)
+    summary = commands.add_parser('summary', help='print the opening distribution and results by first move')
+    summary.add_argument('path')
+    summary.add_argument('--size', type=int, default=3, help='only games on boards of this size')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        random.seed(args.seed)
+        record_games(args.path, args.player_1, args.player_2, args.games, args.size, args.win_length)
+        return
+
+    total = 0
+    print(f'{"First move":<12}{"Games":>10}' + ''.join(f'{result:>10}' for result in RESULTS))
+    for (row, column), results in sorted(results_by_first_move(args.path, args.size).items()):
+        games = sum(results.values())
+        total += games
+        # shown as the coordinates a user types, column from the left and row from the bottom
+        move = f'{column + 1} {args.size - row}'
+        print(f'{move:<12}{games:>10}' + ''.join(f'{results[result]:>10}' for result in RESULTS))
+    print(f'{total} games')
+
+
+if __name__ == '__main__':
+    main()
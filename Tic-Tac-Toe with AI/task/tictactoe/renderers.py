@@ -0,0 +1,47 @@
+"""Renderers drawing the board of the console game, chosen with --render"""
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from board import TicTacToeField
+
+
+class TextRenderer:
+    """Draws the board in a frame, the whole frame is written to the stream at once"""
+
+    def __init__(self, stream=None):
+        # None means the current sys.stdout, so redirected output is followed
+        self.stream = stream
+
+    def format(self, game_field: 'TicTacToeField') -> str:
+        border = '-' * (2 * game_field.size + 3)
+        rows = ''.join('| ' + ' '.join(row) + ' |\n' for row in game_field.field)
+        return f'{border}\n{rows}{border}\n'
+
+    def render(self, game_field: 'TicTacToeField'):
+        (self.stream or sys.stdout).write(self.format(game_field))
+
+
+class CompactRenderer(TextRenderer):
+    """Draws the board on one line: the number of marks, then the rows from the top with '_' for empty cells"""
+
+    def format(self, game_field: 'TicTacToeField') -> str:
+        rows = '/'.join(''.join(row) for row in game_field.field).replace(' ', '_')
+        return f'{game_field.filled:>3} {rows}\n'
+
+
+class NullRenderer(TextRenderer):
+    """Draws nothing, for headless runs"""
+
+    def format(self, game_field: 'TicTacToeField') -> str:
+        return ''
+
+    def render(self, game_field: 'TicTacToeField'):
+        pass
+
+
+RENDERERS = {
+    'text': TextRenderer,
+    'compact': CompactRenderer,
+    'null': NullRenderer,
+}
@@ -0,0 +1,238 @@
+"""
+Solves boards of up to 16 cells (4x4 with win length 3 or 4) bottom-up and writes the values to a table file.
+Positions are numbered in base 3, digit 1 for X and 2 for O in cell row * size + column.
+Reachable positions are enumerated layer by layer by number of marks, then valued from the last layer back:
+a position is lost when the previous move completed a line, drawn when the board is full,
+otherwise it takes the best value over its children.
+Every layer is saved to the checkpoint directory, an interrupted run continues from the last saved layer.
+"""
+import argparse
+import json
+import mmap
+import os
+import resource
+import struct
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from board import TicTacToeField, board_geometry
+
+# values of a position for the side to move, 0 is an unreachable position
+UNKNOWN, LOSS, DRAW, WIN = 0, 1, 2, 3
+MAX_CELLS = 16
+
+
+def peak_memory() -> int:
+    """Peak resident memory of the process in bytes"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RetrogradeSolver:
+    """Enumerates and values all positions reachable from the empty board, see the module docstring"""
+
+    def __init__(self, size: int, win_length: int, checkpoint_dir: str = None, verbose: bool = True):
+        geometry = board_geometry(size, win_length)
+        if geometry.cells_count > MAX_CELLS:
+            raise ValueError(f'Boards of more than {MAX_CELLS} cells do not fit in memory')
+        self.size = size
+        self.win_length = win_length
+        self.cells_count = geometry.cells_count
+        self.lines = np.array(geometry.lines, dtype=np.intp)
+        self.powers = 3 ** np.arange(self.cells_count, dtype=np.int64)
+        self.checkpoint_dir = checkpoint_dir
+        self.verbose = verbose
+        self.layers = []
+        self.values = np.zeros(3 ** self.cells_count, dtype=np.uint8)
+
+    def log(self, message: str):
+        if self.verbose:
+            print(f'{message} ({peak_memory() / 2 ** 20:.0f} MiB peak)', flush=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.checkpoint_dir, f'{self.size}x{self.win_length}_{name}')
+
+    @staticmethod
+    def _save(path: str, array: np.ndarray):
+        """Writes the checkpoint file under a temporary name first, so an interrupted run never leaves half a file"""
+        with open(path + '.tmp', 'wb') as file:
+            np.save(file, array)
+        os.replace(path + '.tmp', path)
+
+    def digits(self, positions: np.ndarray) -> np.ndarray:
+        """(positions, cells) array of the cell digits of every position"""
+        digits = np.empty((positions.size, self.cells_count), dtype=np.int8)
+        # a column at a time, so no temporary array is larger than one column of 64-bit integers
+        for cell in range(self.cells_count):
+            digits[:, cell] = positions // self.powers[cell] % 3
+        return digits
+
+    def won(self, digits: np.ndarray, mark: int) -> np.ndarray:
+        """Which positions have a complete line of the mark"""
+        won = np.zeros(digits.shape[0], dtype=bool)
+        for line in self.lines:
+            won |= (digits[:, line] == mark).all(axis=1)
+        return won
+
+    def children(self, positions: np.ndarray, digits: np.ndarray, mark: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """For every cell, which positions have it empty and the positions after the mark is put there"""
+        return [(digits[:, cell] == 0, positions + mark * self.powers[cell]) for cell in range(self.cells_count)]
+
+    def enumerate_layers(self):
+        """Builds the sorted positions of every layer, the children of the unfinished positions of the layer before"""
+        layer = np.zeros(1, dtype=np.int64)
+        for marks in range(self.cells_count + 1):
+            path = self.checkpoint_dir and self._path(f'layer_{marks}.npy')
+            if path and os.path.exists(path):
+                layer = np.load(path)
+            elif marks:
+                previous = self.layers[-1]
+                # X moves on even layers, the last move was made by the side that moved into this layer
+                mark = 1 if marks % 2 else 2
+                digits = self.digits(previous)
+                unfinished = ~self.won(digits, 2 if mark == 1 else 1)
+                layer = np.unique(np.concatenate([
+                    children[empty & unfinished] for empty, children in self.children(previous, digits, mark)
+                ]))
+                if path:
+                    self._save(path, layer)
+            self.layers.append(layer)
+            self.log(f'Layer {marks}: {layer.size} positions')
+
+    def solve_layers(self):
+        """Values the layers from the full board back to the empty one"""
+        progress_path = self.checkpoint_dir and self._path('progress.json')
+        values_path = self.checkpoint_dir and self._path('values.npy')
+        first = self.cells_count
+        if progress_path and os.path.exists(progress_path):
+            with open(progress_path) as file:
+                first = json.load(file)['next_layer']
+            self.values = np.load(values_path)
+            self.log(f'Resuming from layer {first}')
+
+        for marks in range(first, -1, -1):
+            positions = self.layers[marks]
+            digits = self.digits(positions)
+            mover = 1 if marks % 2 == 0 else 2
+            lost = self.won(digits, 2 if mover == 1 else 1)
+            best = np.full(positions.size, DRAW if marks == self.cells_count else UNKNOWN, dtype=np.uint8)
+            if marks < self.cells_count:
+                for empty, children in self.children(positions, digits, mover):
+                    playable = empty & ~lost
+                    # a child lost for the opponent is won for the mover and the other way round
+                    value = WIN + LOSS - self.values[children[playable]]
+                    best[playable] = np.maximum(best[playable], value)
+            best[lost] = LOSS
+            self.values[positions] = best
+            if progress_path:
+                self._save(values_path, self.values)
+                with open(progress_path, 'w') as file:
+                    json.dump({'next_layer': marks - 1}, file)
+            self.log(f'Solved layer {marks}')
+
+    def solve(self) -> np.ndarray:
+        """Runs both passes and returns the value of every position number"""
+        if self.checkpoint_dir:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+        started = time.perf_counter()
+        self.enumerate_layers()
+        self.solve_layers()
+        positions = sum(layer.size for layer in self.layers)
+        self.log(f'Solved {positions} positions in {time.perf_counter() - started:.1f} s')
+        return self.values
+
+
+class RetrogradeTable:
+    """
+    Values of a solved board read from a table file, two bits per position number, four positions per byte.
+    The file starts with HEADER: the magic, the board size and the win length.
+    Can be given to the hard AI as its solved table, AI(..., search='table', solved_table=table).
+    """
+
+    MAGIC = b'TTR3'
+    HEADER = struct.Struct('<4sBB')
+
+    def __init__(self, buffer, size: int, win_length: int):
+        self.buffer = buffer
+        self.size = size
+        self.win_length = win_length
+
+    @classmethod
+    def load(cls, path: str) -> 'RetrogradeTable':
+        """Maps the file into memory, positions are read on demand"""
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size, win_length = cls.HEADER.unpack_from(buffer)
+        if magic != cls.MAGIC:
+            raise ValueError(f'{path} is not a retrograde table')
+        return cls(buffer, size, win_length)
+
+    @classmethod
+    def save(cls, path: str, values: np.ndarray, size: int, win_length: int):
+        padded = np.zeros(-(-values.size // 4) * 4, dtype=np.uint8)
+        padded[:values.size] = values
+        quads = padded.reshape(-1, 4)
+        packed = quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6
+        with open(path, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, size, win_length))
+            file.write(packed.astype(np.uint8).tobytes())
+
+    def value(self, number: int) -> int:
+        byte = self.buffer[self.HEADER.size + number // 4]
+        return byte >> 2 * (number % 4) & 3
+
+    def position_number(self, game_field: TicTacToeField) -> int:
+        x_bits, o_bits = game_field.bitmasks()
+        number = 0
+        for index in range(game_field.geometry.cells_count):
+            number += 3 ** index * (x_bits >> index & 1 or 2 * (o_bits >> index & 1))
+        return number
+
+    def lookup(self, game_field: TicTacToeField) -> Tuple[int, List[Tuple]]:
+        """
+        Returns the value for the side to move (1 win, 0 draw, -1 loss) and its optimal moves.
+        Raises KeyError for a finished game and for a position that is not reachable with that side to move.
+        """
+        if (game_field.size, game_field.win_length) != (self.size, self.win_length):
+            raise ValueError(f'The table is for {self.size}x{self.size} boards with win length {self.win_length}')
+        if game_field.check_winner():
+            raise KeyError('The game is over')
+        number = self.position_number(game_field)
+        if self.value(number) == UNKNOWN:
+            raise KeyError('Position is not reachable')
+        mark = 1 if game_field.turn == 'X' else 2
+        moves = {}
+        for move in game_field.iter_empty_cells():
+            child = self.value(number + mark * 3 ** (move[0] * self.size + move[1]))
+            if child == UNKNOWN:
+                # the position is reachable, but with the other side to move
+                raise KeyError('Position is not reachable')
+            moves[move] = WIN + LOSS - child
+        best = max(moves.values())
+        return best - DRAW, [move for move, value in moves.items() if value == best]
+
+    def best_move(self, game_field: TicTacToeField) -> Optional[Tuple]:
+        """The first optimal move in iter_empty_cells order, like hard_move chooses"""
+        return self.lookup(game_field)[1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--win-length', type=int, default=None, help='the board size by default')
+    parser.add_argument('--output', default=None, help='table file, retrograde_<size>x<win_length>.bin by default')
+    parser.add_argument('--checkpoint-dir', default=None, help='save every layer here and resume from it')
+    args = parser.parse_args()
+
+    win_length = args.win_length or args.size
+    output = args.output or f'retrograde_{args.size}x{win_length}.bin'
+    solver = RetrogradeSolver(args.size, win_length, args.checkpoint_dir)
+    values = solver.solve()
+    RetrogradeTable.save(output, values, args.size, win_length)
+    result = {LOSS: 'second player wins', DRAW: 'draw', WIN: 'first player wins'}[int(values[0])]
+    print(f'Empty board: {result}, table written to {output} ({os.path.getsize(output)} bytes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""State of a search of the hard AI and the worker tasks of its parallel search"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Array
+from queue import Queue
+from typing import TYPE_CHECKING, Tuple
+
+from pools import process_pool
+
+if TYPE_CHECKING:
+    from tictactoe import AI
+
+# The depth limited search looks at the clock every this many nodes, a node of a large board takes
+# a couple of hundred microseconds, a clock read well under one
+DEADLINE_CHECK_NODES = 32
+
+# Root scores of a parallel search are integers, a root move before the one holding the best score so far
+# is searched with alpha this much below that score, so a move only as good still gets its exact score
+ROOT_EPSILON = 0.5
+
+# Parallel searches of one process that can run at once, each has a bound of its own in the shared array
+SEARCH_SLOTS = 16
+
+_search_bounds = {}
+_search_bound = None
+
+
+def _init_search_worker(bound: Array):
+    global _search_bound
+    _search_bound = bound
+
+
+def search_pool(workers: int) -> Tuple[ProcessPoolExecutor, Array, Queue]:
+    """
+    Returns the process pool of parallel searches, the bounds shared by its workers and the free slots of the bounds.
+    A search takes a slot for as long as it runs, bound[2 * slot] is the best root score it found so far
+    and bound[2 * slot + 1] the number of the move that has it.
+    The pool is started on first use and reused afterwards.
+    """
+    if workers not in _search_bounds:
+        slots = Queue()
+        for slot in range(SEARCH_SLOTS):
+            slots.put(slot)
+        _search_bounds[workers] = Array('d', 2 * SEARCH_SLOTS), slots
+    bound, slots = _search_bounds[workers]
+    return process_pool(workers, _init_search_worker, (bound,)), bound, slots
+
+
+def search_root_move(searcher: 'AI', slot: int, number: int, move: Tuple) -> Tuple[float, bool, int]:
+    """
+    Worker task of the parallel search, returns the alpha-beta score of one root move of the searcher's field,
+    whether the score is exact and the nodes searched.
+    Only a strictly better score can replace the best move when this move comes after it,
+    an equal score is enough when it comes before. Exact scores raise the bound of the search's slot.
+    """
+    context = SearchContext()
+    start = 2 * slot
+    with _search_bound.get_lock():
+        best_score, best_number = _search_bound[start:start + 2]
+    # alpha_beta relies on windows inside [-1, 1] to store wins and losses found outside the window
+    alpha = best_score if number > best_number else max(best_score - ROOT_EPSILON, -1)
+    if alpha >= 1:
+        # nothing beats an earlier win, the empty window would store bounds as exact scores
+        return -2, False, 0
+    game_field = searcher.game_field
+    game_field.move(move)
+    score = searcher.alpha_beta(False, alpha, 1, game_field, context)
+    exact = score > alpha
+    if exact:
+        with _search_bound.get_lock():
+            if (score, -number) > (_search_bound[start], -_search_bound[start + 1]):
+                _search_bound[start:start + 2] = [score, number]
+    return score, exact, context.nodes
+
+
+class SearchContext:
+    """
+    State of one search: the nodes visited, the evaluations made at the depth limit, the deadline,
+    the best root move of the running iteration so far and the info reported when it is done.
+    Every search has its own, so searches of one AI may run at once.
+    """
+
+    def __init__(self, deadline: float = math.inf):
+        self.nodes = 0
+        self.evaluations = 0
+        self.deadline = deadline
+        self.root_move = None
+        self.info = {}
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget is exhausted"""
@@ -0,0 +1,133 @@
+"""
+Hosts tic-tac-toe sessions over TCP with asyncio.
+The line protocol speaks the console commands: 'start <player_1> <player_2> [size [win_length]]',
+'x y' coordinates and 'exit'. The server answers with the console output, prompts are sent on their own lines.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from board import TicTacToeField, board_geometry
+from renderers import TextRenderer
+from tictactoe import AI, GameFactory, ParametersError, User, parse_command_line
+
+# levels cheap enough to answer directly on the event loop
+INLINE_LEVELS = ('easy', 'medium')
+USER_MESSAGES = {
+    'Not a Number': 'You should enter numbers!',
+    'Cell is occupied': 'This cell is occupied! Choose another one!',
+}
+
+
+def choose_move(game_field: TicTacToeField, mark: str, level: str) -> Tuple:
+    """Returns the move an AI of given level makes in the position, runs in a worker process for slow levels"""
+    ai = AI(game_field, mark, level, verbose=False, workers=1)
+    ai.make_move()
+    return ai.coordinates
+
+
+class Session:
+    """One client connection with its own field and game"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, executor: ProcessPoolExecutor):
+        self.reader = reader
+        self.writer = writer
+        self.executor = executor
+        self.renderer = TextRenderer()
+
+    async def send(self, text: str):
+        self.writer.write(text.encode())
+        await self.writer.drain()
+
+    async def receive(self, prompt: str) -> str:
+        """Sends the prompt and waits for the answer line, raises EOFError when the client is gone"""
+        await self.send(prompt + '\n')
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError
+        return line.decode().strip()
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    command = parse_command_line(await self.receive('Input command:'))
+                except ParametersError:
+                    await self.send('Bad parameters!\n')
+                    continue
+                if command == 'break':
+                    break
+                await self.play(*command)
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+
+    async def play(self, player_1: str, player_2: str, size: int, win_length: int):
+        # parse_command_line caps the size, still a new geometry of a large board takes a while to build
+        await asyncio.get_running_loop().run_in_executor(None, board_geometry, size, win_length)
+        game_field = TicTacToeField(size, win_length)
+        game = GameFactory(player_1, player_2, game_field, verbose=False)
+        await self.send(self.renderer.format(game_field))
+        while True:
+            if isinstance(game.turn, User):
+                await self.user_move(game.turn, game_field)
+            else:
+                await self.ai_move(game.turn, game_field)
+            game.pass_turn()
+            await self.send(self.renderer.format(game_field))
+            winner = game_field.check_winner()
+            if winner:
+                await self.send((winner if winner == 'Draw' else f'{winner} wins!') + '\n')
+                return
+
+    async def user_move(self, user: User, game_field: TicTacToeField):
+        while True:
+            validation_result = user.validate_coordinates(tuple((await self.receive('Enter the coordinates:')).split()))
+            if validation_result == 'Valid':
+                game_field.move(user.coordinates)
+                return
+            elif validation_result == 'Incorrect coordinates':
+                await self.send(f'Coordinates should be from 1 to {game_field.size}!\n')
+            else:
+                await self.send(USER_MESSAGES[validation_result] + '\n')
+
+    async def ai_move(self, ai: AI, game_field: TicTacToeField):
+        if ai.difficult in INLINE_LEVELS:
+            ai.make_move()
+        else:
+            # searches run in another process on a snapshot, the event loop keeps serving other sessions
+            loop = asyncio.get_running_loop()
+            coordinates = await loop.run_in_executor(self.executor, choose_move, game_field.fork(), ai.mark,
+                                                     ai.difficult)
+            game_field.move(coordinates)
+        await self.send(f'Making move level "{ai.difficult}"\n')
+
+
+async def serve(host: str, port: int, workers: int = None):
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await Session(reader, writer, executor).run()
+
+    server = await asyncio.start_server(handle, host, port, backlog=4096)
+    print(f'Serving on {host}:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help='search processes, all cores by default')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Transposition table in shared memory for hard AIs running in several processes, see tournament.py --shared-cache"""
+import os
+import struct
+from multiprocessing import shared_memory
+from typing import Optional
+
+
+class SharedTranspositionTable:
+    """
+    Minimax scores in a fixed number of slots of shared memory,
+    so worker processes attached to the same block reuse each other's searches.
+    A slot holds two 64-bit words: the key fingerprint XOR the data, and the data.
+    Writers take no lock, a slot torn by two simultaneous writes fails the XOR check and reads as empty.
+    Every position goes to one slot, a new position replaces the old one.
+    """
+
+    MAGIC = b'TTS1'
+    HEADER = struct.Struct('<4sQ')
+    SLOT = struct.Struct('<QQ')
+    FINGERPRINT_MASK = (1 << 64) - 1
+    # largest prime below 2 ** 64, folds keys of larger boards into a fingerprint
+    FINGERPRINT_PRIME = (1 << 64) - 59
+
+    def __init__(self, memory: shared_memory.SharedMemory, slots: int, owner: bool):
+        self.memory = memory
+        self.slots = slots
+        self.owner = owner
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def create(cls, slots: int = 1 << 20, path: str = None) -> 'SharedTranspositionTable':
+        """Allocates a new shared block, filled from the file at path if it exists"""
+        table = cls(shared_memory.SharedMemory(create=True, size=slots * cls.SLOT.size), slots, owner=True)
+        if path is not None and os.path.exists(path):
+            try:
+                table.load(path)
+            except (OSError, ValueError, struct.error):
+                table.close()
+                raise
+        return table
+
+    @classmethod
+    def attach(cls, name: str, slots: int) -> 'SharedTranspositionTable':
+        """Opens a block created by another process"""
+        return cls(shared_memory.SharedMemory(name=name), slots, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def __getstate__(self) -> dict:
+        # pickled tables are attached again on the other side, never copied
+        return {'name': self.memory.name, 'slots': self.slots}
+
+    def __setstate__(self, state: dict):
+        self.__init__(shared_memory.SharedMemory(name=state['name']), state['slots'], owner=False)
+
+    def __len__(self) -> int:
+        return sum(1 for slot in range(self.slots) if self._read(slot, None) is not None)
+
+    def _fingerprint(self, key: int) -> int:
+        return key if key <= self.FINGERPRINT_MASK else key % self.FINGERPRINT_PRIME
+
+    def _slot(self, fingerprint: int) -> int:
+        # keys of one board size share their low bits, so the slot is taken from the high bits of a mixed key
+        return (fingerprint * 0x9E3779B97F4A7C15 & self.FINGERPRINT_MASK) * self.slots >> 64
+
+    def _read(self, slot: int, fingerprint: Optional[int]) -> Optional[int]:
+        """Returns the data of the slot if it is valid and, unless fingerprint is None, holds that position"""
+        check, data = self.SLOT.unpack_from(self.memory.buf, slot * self.SLOT.size)
+        if not data & 1 or fingerprint is not None and check ^ data != fingerprint:
+            return None
+        return data
+
+    def _lookup(self, key: int) -> Optional[int]:
+        fingerprint = self._fingerprint(key)
+        data = self._read(self._slot(fingerprint), fingerprint)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def get(self, key: int) -> Optional[int]:
+        """Returns the stored score or None if the position was not searched yet"""
+        data = self._lookup(key)
+        return None if data is None else (data >> 1 & 3) - 1
+
+    def put(self, key: int, score: int):
+        """Stores the score"""
+        # bit 0 marks a used slot, bits 1-2 hold score + 1
+        data = 1 | (score + 1) << 1
+        fingerprint = self._fingerprint(key)
+        self.SLOT.pack_into(self.memory.buf, self._slot(fingerprint) * self.SLOT.size, fingerprint ^ data, data)
+
+    def clear(self):
+        """Forgets all positions and resets the counters"""
+        self.memory.buf[:self.slots * self.SLOT.size] = bytes(self.slots * self.SLOT.size)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters of this process and the number of slots"""
+        return {'hits': self.hits, 'misses': self.misses, 'slots': self.slots}
+
+    def save(self, path: str):
+        with open(path, 'wb') as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.slots))
+            file.write(self.memory.buf[:self.slots * self.SLOT.size])
+
+    def load(self, path: str):
+        """Fills the table from a saved file, the file must have the same number of slots"""
+        with open(path, 'rb') as file:
+            magic, slots = self.HEADER.unpack(file.read(self.HEADER.size))
+            if magic != self.MAGIC or slots != self.slots:
+                raise ValueError(f'{path} is not a transposition table with {self.slots} slots')
+            if file.readinto(self.memory.buf[:self.slots * self.SLOT.size]) < self.slots * self.SLOT.size:
+                raise ValueError(f'{path} is truncated')
+
+    def close(self):
+        """Detaches from the block, the process that created it also frees it"""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
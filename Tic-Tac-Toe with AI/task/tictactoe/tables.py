@@ -0,0 +1,163 @@
+"""Tables of searched positions: the transposition table of the searches and the solved 3x3 table"""
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from board import TicTacToeField
+
+
+class TranspositionTable:
+    """Minimax scores of already searched positions with LRU eviction, safe to share between threads"""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> dict:
+        # the entries stay in this process, a table pickled for a worker process arrives empty
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['maxsize'])
+
+    def get(self, key: int) -> Optional[int]:
+        """Returns the stored score or None if the position was not searched yet"""
+        with self.lock:
+            try:
+                score = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: int, score: int):
+        """Stores the score, evicting the least recently used position when the table is full"""
+        with self.lock:
+            self.entries[key] = score
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Forgets all positions and resets the counters"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+# POSITION_DIGITS[mask] is the base 3 number with digit 1 in every cell set in the 9-bit mask
+POSITION_DIGITS = tuple(sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(1 << 9))
+
+
+def position_index(game_field: TicTacToeField) -> int:
+    """Base 3 number of the board, digit 0 for an empty cell, 1 for X and 2 for O"""
+    x_bits, o_bits = game_field.bitmasks()
+    return POSITION_DIGITS[x_bits] + 2 * POSITION_DIGITS[o_bits]
+
+
+class SolvedTable:
+    """
+    Minimax value and optimal moves of every reachable position.
+    The file is a 4-byte header followed by one little-endian 16-bit entry per position_index:
+    bit 15 marks a reachable position, bits 9-10 hold the value for the side to move plus one
+    and bits 0-8 are the cells of the optimal moves.
+    """
+    MAGIC = b'TTT1'
+    ENTRY = struct.Struct('<H')
+    SIZE = 3 ** 9
+    DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solved_table.bin')
+    _default = None
+
+    def __init__(self, buffer):
+        if buffer[:len(self.MAGIC)] != self.MAGIC or len(buffer) != len(self.MAGIC) + self.SIZE * self.ENTRY.size:
+            raise ValueError('Not a solved position table')
+        self.buffer = buffer
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> 'SolvedTable':
+        """Maps the table file into memory"""
+        with open(path, 'rb') as file:
+            return cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def default(cls) -> 'SolvedTable':
+        """Table shared by the process, mapped from DEFAULT_PATH which is shipped with the game"""
+        if cls._default is None:
+            if not os.path.exists(cls.DEFAULT_PATH):
+                raise FileNotFoundError(f'{cls.DEFAULT_PATH} is missing, regenerate it with build_table.py')
+            cls._default = cls.load()
+        return cls._default
+
+    @classmethod
+    def build(cls) -> bytes:
+        """Solves every position reachable from the empty board and packs the results"""
+        entries = [0] * cls.SIZE
+        cls._solve(TicTacToeField(), entries)
+        return cls.MAGIC + b''.join(cls.ENTRY.pack(entry) for entry in entries)
+
+    @classmethod
+    def _solve(cls, game_field: TicTacToeField, entries: List[int]) -> int:
+        """Fills entries for the position and everything reachable from it, returns its value for the side to move"""
+        index = position_index(game_field)
+        if entries[index]:
+            return (entries[index] >> 9 & 3) - 1
+
+        result = game_field.check_winner()
+        moves = 0
+        if result == 'Draw':
+            value = 0
+        elif result:
+            value = -1
+        else:
+            value = -2
+            for move in game_field.iter_empty_cells():
+                game_field.move(move)
+                score = -cls._solve(game_field, entries)
+                game_field.undo(move)
+                cell = 1 << (move[0] * 3 + move[1])
+                if score > value:
+                    value = score
+                    moves = cell
+                elif score == value:
+                    moves |= cell
+        entries[index] = 1 << 15 | (value + 1) << 9 | moves
+        return value
+
+    def save(self, path: str = DEFAULT_PATH):
+        """Writes the table to a file"""
+        with open(path, 'wb') as file:
+            file.write(self.buffer)
+
+    def lookup(self, game_field: TicTacToeField) -> Tuple[int, List[Tuple]]:
+        """
+        Returns the value for the side to move and the optimal moves of the position.
+        Raises KeyError for a finished game and for a position that is not reachable.
+        """
+        if (game_field.size, game_field.win_length) != (3, 3):
+            raise ValueError('Solved table covers the 3x3 board only')
+        if game_field.check_winner():
+            raise KeyError('The game is over')
+        entry = self.ENTRY.unpack_from(self.buffer, len(self.MAGIC) + position_index(game_field) * self.ENTRY.size)[0]
+        if not entry:
+            raise KeyError('Position is not reachable')
+        return (entry >> 9 & 3) - 1, [divmod(index, 3) for index in range(9) if entry >> index & 1]
+
+    def best_move(self, game_field: TicTacToeField) -> Tuple:
+        """The optimal move hard_move would choose, the first one in get_empty_cells order"""
+        return self.lookup(game_field)[1][0]
@@ -0,0 +1,109 @@
+"""
+Checks the NumPy batch simulator of batch.py against the per-game AI of tictactoe.py:
+the medium policy wins and blocks like AI.medium_move, finished boards have the result check_winner gives
+and the results of many games follow those of games played one by one.
+Run from this directory with python -m unittest test_batch or python -m pytest test_batch.py.
+"""
+import random
+import unittest
+
+import numpy as np
+
+from batch import DRAW, O_WINS, ONGOING, X_WINS, BatchSimulator
+from board import BitboardField, TicTacToeField
+from positions import reachable_positions
+from tictactoe import AI, GameFactory
+
+RESULTS = {X_WINS: 'X', O_WINS: 'O', DRAW: 'Draw'}
+
+
+def board_row(game_field: TicTacToeField) -> list:
+    """The field as a row of the simulator's boards"""
+    x_bits, o_bits = game_field.bitmasks()
+    return [(x_bits >> cell & 1) - (o_bits >> cell & 1) for cell in range(game_field.geometry.cells_count)]
+
+
+def field_of(board: np.ndarray, size: int, win_length: int) -> BitboardField:
+    """The field holding the marks of a simulator board"""
+    game_field = BitboardField(size, win_length)
+    for cell, value in enumerate(board):
+        if value:
+            game_field.turn = 'X' if value == 1 else 'O'
+            game_field.move(divmod(cell, size))
+    return game_field
+
+
+class BatchTest(unittest.TestCase):
+
+    def check_medium_moves(self, positions: list, size: int, win_length: int):
+        simulator = BatchSimulator(len(positions), 'medium', 'medium', size, win_length, seed=1)
+        boards = np.array([board_row(game_field) for game_field in positions], dtype=np.int8)
+        for mark, turn in ((1, 'X'), (-1, 'O')):
+            indexes = [index for index, game_field in enumerate(positions) if game_field.turn == turn]
+            cells = simulator._medium_cells(boards[indexes], mark)
+            for index, cell in zip(indexes, cells):
+                game_field = positions[index]
+                other = 'O' if turn == 'X' else 'X'
+                if game_field.get_threat(turn) is None and game_field.get_threat(other) is None:
+                    continue
+                ai = AI(game_field, turn, 'medium', verbose=False)
+                ai.medium_move()
+                game_field.undo(ai.coordinates)
+                with self.subTest(field=game_field.bitmasks(), turn=turn):
+                    self.assertEqual(divmod(int(cell), size), ai.coordinates)
+
+    def test_medium_moves(self):
+        positions = [
+            game_field for game_field in reachable_positions(TicTacToeField()) if not game_field.check_winner()
+        ]
+        self.check_medium_moves(positions, 3, 3)
+
+    def test_medium_moves_larger_board(self):
+        rng = random.Random(4)
+        positions = []
+        while len(positions) < 500:
+            game_field = BitboardField(5, 4)
+            for _ in range(rng.randrange(4, 15)):
+                game_field.move(rng.choice(game_field.get_empty_cells()))
+                if game_field.check_winner():
+                    break
+            else:
+                positions.append(game_field)
+        self.check_medium_moves(positions, 5, 4)
+
+    def test_finished_boards(self):
+        for size, win_length, player_1, player_2 in ((3, 3, 'easy', 'medium'), (4, 3, 'medium', 'easy')):
+            simulator = BatchSimulator(2000, player_1, player_2, size, win_length, seed=2)
+            results = simulator.run()
+            self.assertFalse((results == ONGOING).any())
+            for board, result in zip(simulator.boards, results):
+                with self.subTest(size=size, board=board.tolist()):
+                    self.assertIn(np.count_nonzero(board == 1) - np.count_nonzero(board == -1), (0, 1))
+                    self.assertEqual(field_of(board, size, win_length).check_winner(), RESULTS[result])
+
+    def test_results_follow_single_games(self):
+        games = 2000
+        for player_1, player_2 in (('easy', 'easy'), ('medium', 'easy'), ('medium', 'medium')):
+            simulator = BatchSimulator(20000, player_1, player_2, seed=3)
+            simulator.run()
+            batch = simulator.summary()
+
+            random.seed(3)
+            single = dict.fromkeys(('X', 'O', 'Draw'), 0)
+            for _ in range(games):
+                game_field = TicTacToeField()
+                game = GameFactory(player_1, player_2, game_field, verbose=False)
+                while not game_field.check_winner():
+                    game.next_move()
+                single[game_field.check_winner()] += 1
+
+            for result in single:
+                rate = batch[result] / 20000
+                # the single games are the smaller sample, allow five of their standard errors
+                tolerance = 5 * (rate * (1 - rate) / games) ** 0.5
+                with self.subTest(players=(player_1, player_2), result=result):
+                    self.assertAlmostEqual(single[result] / games, rate, delta=tolerance)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Checks that game records written by records.py read back unchanged, on boards whose moves pack two to a byte
+and on boards up to the largest one, and that broken files are rejected.
+Run from this directory with python -m unittest test_records or python -m pytest test_records.py.
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from board import MAX_SIZE
+from records import MAGIC, GameRecord, GameWriter, read_games, record_games, replay
+
+
+class RecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'games.bin')
+
+    def test_round_trip(self):
+        shuffled = list(range(MAX_SIZE ** 2))
+        random.Random(1).shuffle(shuffled)
+        records = [
+            GameRecord('hard', 'easy', 3, 3, 'X', (4, 0, 8, 2, 6, 1, 7)),
+            GameRecord('user', 'mcts', 3, 3, 'Draw', (4, 0, 8, 2, 1, 7, 6, 3, 5)),
+            GameRecord('medium', 'hard', 4, 3, 'O', (15, 0, 14, 5, 12, 10)),
+            GameRecord('easy', 'medium', 5, 4, 'X', (24, 0, 18, 1, 12, 2, 6, 3)),
+            GameRecord('easy', 'easy', MAX_SIZE, MAX_SIZE, 'Draw', tuple(shuffled)),
+        ]
+        with GameWriter(self.path) as writer:
+            for record in records:
+                writer.write(record)
+        self.assertEqual(list(read_games(self.path)), records)
+
+    def test_full_game_on_largest_board(self):
+        random.seed(2)
+        record_games(self.path, 'easy', 'easy', 1, MAX_SIZE, MAX_SIZE)
+        record, = read_games(self.path)
+        self.assertEqual((record.size, record.win_length, record.result), (MAX_SIZE, MAX_SIZE, 'Draw'))
+        self.assertEqual(sorted(record.moves), list(range(MAX_SIZE ** 2)))
+        for game_field in replay(record):
+            pass
+        self.assertEqual(game_field.check_winner(), 'Draw')
+
+    def test_recorded_games_replay(self):
+        random.seed(3)
+        record_games(self.path, 'easy', 'medium', 50)
+        records = list(read_games(self.path))
+        self.assertEqual(len(records), 50)
+        for record in records:
+            with self.subTest(moves=record.moves):
+                results = [game_field.check_winner() for game_field in replay(record)]
+                # the game ends with its last move
+                self.assertEqual(results[-1], record.result)
+                self.assertFalse(any(results[:-1]))
+
+    def test_appends(self):
+        record = GameRecord('hard', 'hard', 3, 3, 'Draw', (4, 0, 8, 2, 1, 7, 6, 3, 5))
+        for _ in range(2):
+            with GameWriter(self.path) as writer:
+                writer.write(record)
+        self.assertEqual(list(read_games(self.path)), [record, record])
+
+    def test_board_too_large(self):
+        with GameWriter(self.path) as writer:
+            with self.assertRaises(ValueError):
+                writer.write(GameRecord('easy', 'easy', MAX_SIZE + 1, 3, 'X', (0,)))
+
+    def test_broken_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'TTR1')
+        with self.assertRaises(ValueError):
+            list(read_games(self.path))
+
+        with GameWriter(self.path + '.full') as writer:
+            writer.write(GameRecord('easy', 'easy', 5, 5, 'Draw', tuple(range(25))))
+        with open(self.path + '.full', 'rb') as file:
+            data = file.read()
+        for length in (len(MAGIC) + 3, len(data) - 1):
+            with open(self.path, 'wb') as file:
+                file.write(data[:length])
+            with self.subTest(length=length):
+                with self.assertRaises(ValueError):
+                    list(read_games(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
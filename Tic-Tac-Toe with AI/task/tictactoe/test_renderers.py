@@ -0,0 +1,66 @@
+"""
+Checks the board renderers. The text renderer must print every 3x3 board byte for byte like the original
+print_game_field, tests.py reads the boards from that output.
+Run from this directory with python -m unittest test_renderers or python -m pytest test_renderers.py.
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from board import BitboardField, TicTacToeField
+from positions import reachable_positions
+from renderers import CompactRenderer, NullRenderer, TextRenderer
+
+
+def original_output(game_field: TicTacToeField) -> str:
+    """The board as the original print_game_field printed it"""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        print('---------')
+        for row in game_field.field:
+            print('|', end=' ')
+            for element in row:
+                print(element, end=' ')
+            print('|', end='\n')
+        print('---------')
+    return output.getvalue()
+
+
+class RenderersTest(unittest.TestCase):
+
+    def test_text_matches_original(self):
+        for game_field in reachable_positions(TicTacToeField()):
+            with self.subTest(field=game_field.bitmasks()):
+                output = io.StringIO()
+                TextRenderer(output).render(game_field)
+                self.assertEqual(output.getvalue(), original_output(game_field))
+
+    def test_print_game_field(self):
+        game_field = TicTacToeField()
+        for move in ((1, 1), (0, 0), (2, 1)):
+            game_field.move(move)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            game_field.print_game_field()
+        self.assertEqual(output.getvalue(), '---------\n| O     |\n|   X   |\n|   X   |\n---------\n')
+
+    def test_text_larger_board(self):
+        game_field = BitboardField(4, 3)
+        game_field.move((0, 3))
+        self.assertEqual(TextRenderer().format(game_field),
+                         '-----------\n|       X |\n|         |\n|         |\n|         |\n-----------\n')
+
+    def test_compact(self):
+        game_field = TicTacToeField()
+        for move in ((1, 1), (0, 0)):
+            game_field.move(move)
+        self.assertEqual(CompactRenderer().format(game_field), '  2 O__/_X_/___\n')
+
+    def test_null(self):
+        output = io.StringIO()
+        NullRenderer(output).render(TicTacToeField())
+        self.assertEqual(output.getvalue(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
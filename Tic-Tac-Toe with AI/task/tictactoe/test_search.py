@@ -0,0 +1,113 @@
+"""
+Checks every search mode of the hard AI and both field engines against exhaustive minimax
+without a transposition table on every position of the 3x3 board.
+Run from this directory with python -m unittest test_search or python -m pytest test_search.py.
+"""
+import math
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from board import TicTacToeField
+from positions import reachable_positions
+from shared_table import SharedTranspositionTable
+from tables import TranspositionTable
+from tictactoe import AI
+
+
+def list_field(game_field: TicTacToeField) -> TicTacToeField:
+    """The position of the field on a list field"""
+    copy = TicTacToeField(game_field.size, game_field.win_length)
+    x_bits, o_bits = game_field.bitmasks()
+    for index, cell in enumerate(game_field.geometry.cells):
+        for mark, bits in zip('XO', (x_bits, o_bits)):
+            if bits >> index & 1:
+                copy.turn = mark
+                copy.move(cell)
+    copy.turn = game_field.turn
+    return copy
+
+
+def minimax_move(game_field: TicTacToeField) -> tuple:
+    return AI(game_field, game_field.turn, 'hard', transposition_table=None, search='minimax',
+              verbose=False).best_move()
+
+
+class SearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # unfinished positions other than the empty board, where the hard AI moves at random
+        cls.positions = [
+            game_field for game_field in reachable_positions(TicTacToeField())
+            if not game_field.check_winner() and game_field.filled
+        ]
+        cls.baseline = {(game_field.bitmasks(), game_field.turn): minimax_move(game_field)
+                        for game_field in cls.positions}
+
+    def test_positions(self):
+        self.assertEqual(len(self.positions), 4519)
+
+    def check_mode(self, **options):
+        options.setdefault('transposition_table', TranspositionTable())
+        for game_field in self.positions:
+            ai = AI(game_field, game_field.turn, 'hard', verbose=False, **options)
+            with self.subTest(field=game_field.bitmasks(), turn=game_field.turn):
+                self.assertEqual(ai.best_move(), self.baseline[game_field.bitmasks(), game_field.turn])
+
+    def test_minimax_with_table(self):
+        self.check_mode(search='minimax')
+
+    def test_alphabeta(self):
+        self.check_mode(search='alphabeta')
+
+    def test_solved_table(self):
+        self.check_mode(search='table')
+
+    def test_iterative(self):
+        self.check_mode(search='iterative', time_budget=math.inf)
+
+    def test_parallel(self):
+        self.check_mode(search='parallel', workers=2)
+
+    def test_parallel_shared_table(self):
+        table = SharedTranspositionTable.create(1 << 12)
+        try:
+            self.check_mode(search='parallel', workers=2, transposition_table=table)
+        finally:
+            table.close()
+
+    def test_parallel_concurrent(self):
+        # searches running at once in threads of one process must not share the bound of the root moves
+        positions = [game_field for game_field in self.positions if game_field.num_empty >= 5]
+
+        def search(game_field: TicTacToeField) -> tuple:
+            return AI(game_field, game_field.turn, 'hard', transposition_table=TranspositionTable(), search='parallel',
+                      workers=2, verbose=False).best_move()
+
+        with ThreadPoolExecutor(8) as threads:
+            moves = list(threads.map(search, positions))
+        for game_field, move in zip(positions, moves):
+            with self.subTest(field=game_field.bitmasks(), turn=game_field.turn):
+                self.assertEqual(move, self.baseline[game_field.bitmasks(), game_field.turn])
+
+    def test_stack(self):
+        self.check_mode(search='stack')
+
+    def test_engines_agree(self):
+        for game_field in self.positions:
+            other = list_field(game_field)
+            with self.subTest(field=game_field.bitmasks(), turn=game_field.turn):
+                self.assertEqual(other.bitmasks(), game_field.bitmasks())
+                self.assertEqual(other.check_winner(), game_field.check_winner())
+                self.assertEqual(other.get_empty_cells(), game_field.get_empty_cells())
+                self.assertEqual(minimax_move(other), self.baseline[game_field.bitmasks(), game_field.turn])
+
+    def test_engines_agree_on_finished_games(self):
+        for game_field in reachable_positions(TicTacToeField()):
+            if game_field.check_winner():
+                with self.subTest(field=game_field.bitmasks()):
+                    self.assertEqual(list_field(game_field).check_winner(), game_field.check_winner())
+
+
+if __name__ == '__main__':
+    unittest.main()
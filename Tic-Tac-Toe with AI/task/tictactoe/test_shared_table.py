@@ -0,0 +1,103 @@
+"""
+Checks the transposition table in shared memory: scores, keys of large boards, saving and loading,
+the checks of a loaded file and tables passed to worker processes.
+Run from this directory with python -m unittest test_shared_table or python -m pytest test_shared_table.py.
+"""
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from board import MAX_SIZE, TicTacToeField, canonical_key
+from shared_table import SharedTranspositionTable
+
+SLOTS = 1 << 10
+
+
+def put_scores(table: SharedTranspositionTable, scores: dict):
+    """Worker task, stores the scores in a table passed to the worker process"""
+    for key, score in scores.items():
+        table.put(key, score)
+    table.close()
+
+
+def position_keys() -> list:
+    """Keys of a few positions on the smallest and the largest board, the latter larger than 64 bits"""
+    keys = []
+    for size in (3, MAX_SIZE):
+        game_field = TicTacToeField(size, 3)
+        for move in ((0, 0), (1, 1), (2, 0), (0, 2)):
+            game_field.move(move)
+            keys.append(canonical_key(game_field))
+    return keys
+
+
+class SharedTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SharedTranspositionTable.create(SLOTS)
+        self.addCleanup(self.table.close)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'table.bin')
+        self.scores = {key: number % 3 - 1 for number, key in enumerate(position_keys())}
+
+    def fill(self, table: SharedTranspositionTable):
+        for key, score in self.scores.items():
+            table.put(key, score)
+
+    def assert_scores(self, table: SharedTranspositionTable):
+        for key, score in self.scores.items():
+            with self.subTest(key=key):
+                self.assertEqual(table.get(key), score)
+
+    def test_put_get(self):
+        self.assertTrue(any(key >> 64 for key in self.scores))
+        for key in self.scores:
+            self.assertIsNone(self.table.get(key))
+        self.fill(self.table)
+        self.assert_scores(self.table)
+        self.assertEqual(len(self.table), len(self.scores))
+        self.table.clear()
+        self.assertEqual(len(self.table), 0)
+
+    def test_save_load(self):
+        self.fill(self.table)
+        self.table.save(self.path)
+        loaded = SharedTranspositionTable.create(SLOTS, self.path)
+        self.addCleanup(loaded.close)
+        self.assert_scores(loaded)
+        self.assertEqual(len(loaded), len(self.scores))
+
+    def test_load_other_slots(self):
+        self.table.save(self.path)
+        with self.assertRaisesRegex(ValueError, f'{2 * SLOTS} slots'):
+            SharedTranspositionTable.create(2 * SLOTS, self.path)
+
+    def test_load_broken_files(self):
+        self.table.save(self.path)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        for broken in (b'TTS0' + data[4:], data[:-1]):
+            with open(self.path, 'wb') as file:
+                file.write(broken)
+            with self.subTest(length=len(broken), magic=broken[:4]):
+                with self.assertRaises(ValueError):
+                    SharedTranspositionTable.create(SLOTS, self.path)
+
+    def test_pickle_attaches(self):
+        attached = pickle.loads(pickle.dumps(self.table))
+        self.addCleanup(attached.close)
+        self.assertFalse(attached.owner)
+        self.fill(attached)
+        self.assert_scores(self.table)
+
+    def test_worker_process(self):
+        with ProcessPoolExecutor(1) as pool:
+            pool.submit(put_scores, self.table, self.scores).result()
+        self.assert_scores(self.table)
+
+
+if __name__ == '__main__':
+    unittest.main()
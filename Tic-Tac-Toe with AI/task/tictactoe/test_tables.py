@@ -0,0 +1,69 @@
+"""
+Checks the solved position tables: the shipped 3x3 SolvedTable and a RetrogradeTable of retrograde.py.
+Run from this directory with python -m unittest test_tables or python -m pytest test_tables.py.
+"""
+import os
+import tempfile
+import unittest
+
+from board import TicTacToeField
+from positions import reachable_positions
+from retrograde import RetrogradeSolver, RetrogradeTable
+from tables import SolvedTable
+
+
+def play(*moves: tuple) -> TicTacToeField:
+    game_field = TicTacToeField()
+    for move in moves:
+        game_field.move(move)
+    return game_field
+
+
+class TablesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solved = SolvedTable.default()
+        values = RetrogradeSolver(3, 3, verbose=False).solve()
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'retrograde_3x3.bin')
+        RetrogradeTable.save(path, values, 3, 3)
+        cls.retrograde = RetrogradeTable.load(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.retrograde.buffer.close()
+        cls.directory.cleanup()
+
+    def test_retrograde_matches_solved(self):
+        for game_field in reachable_positions(TicTacToeField()):
+            if game_field.check_winner():
+                continue
+            with self.subTest(field=game_field.bitmasks(), turn=game_field.turn):
+                self.assertEqual(self.retrograde.lookup(game_field), self.solved.lookup(game_field))
+                self.assertEqual(self.retrograde.best_move(game_field), self.solved.best_move(game_field))
+
+    def test_finished_games(self):
+        won = play((0, 0), (1, 0), (0, 1), (1, 1), (0, 2))
+        drawn = play((0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (2, 0), (2, 1), (1, 2), (2, 2))
+        for table in (self.solved, self.retrograde):
+            for game_field in (won, drawn):
+                with self.subTest(table=type(table).__name__, winner=game_field.check_winner()):
+                    with self.assertRaisesRegex(KeyError, 'The game is over'):
+                        table.lookup(game_field)
+                    with self.assertRaisesRegex(KeyError, 'The game is over'):
+                        table.best_move(game_field)
+
+    def test_unreachable(self):
+        # two X marks and no O
+        game_field = play((0, 0))
+        game_field.next_turn()
+        game_field.move((0, 1))
+        for table in (self.solved, self.retrograde):
+            with self.subTest(table=type(table).__name__):
+                with self.assertRaises(KeyError):
+                    table.lookup(game_field)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,71 +1,47 @@
+import argparse
+import os
 import random
+import sys
+import time
 from abc import ABC, abstractmethod
-from typing import List, Tuple
-
-
-class TicTacToeField:
-    """Game field"""
-
-    def __init__(self):
-        self.field = [[' ' for _ in range(3)] for _ in range(3)]
-        self.turn = 'X'
-
-    def print_game_field(self):
-        """Prints game_field field to console"""
-        print('---------')
-        for row in self.field:
-            print('|', end=' ')
-            for element in row:
-                print(element, end=' ')
-            print('|', end='\n')
-        print('---------')
-
-    def get_empty_cells(self) -> List[Tuple]:
-        """Finds all empty cells and returns it"""
-        empty_cells = []
-        for index_row, value_row in enumerate(self.field):
-            for index_cell, value_cell in enumerate(value_row):
-                if value_cell == ' ':
-                    empty_cells.append((index_row, index_cell))
-        return empty_cells
-
-    def move(self, coordinates: Tuple[int, int]):
-        """Makes a move"""
-        x = coordinates[0]
-        y = coordinates[1]
-        self.field[x][y] = self.turn
-        self.next_turn()
-
-    def undo(self, coordinates: Tuple[int, int]):
-        """Cancels the move"""
-        x = coordinates[0]
-        y = coordinates[1]
-        self.field[x][y] = ' '
-        self.next_turn()
-
-    def next_turn(self):
-        """Ends the current player’s turn and setups state for the next."""
-        self.turn = 'X' if self.turn == 'O' else 'O'
-
-    def check_winner(self) -> str:
-        """Check who wins"""
-        if self._win_condition('O'):
-            return 'O'
-        elif self._win_condition('X'):
-            return 'X'
-        elif not self.get_empty_cells():
-            return 'Draw'
-
-    def _win_condition(self, elem: str) -> bool:
-        """Check wins conditions"""
-        triple = [elem, elem, elem]
-
-        row = self.field
-        column = [[c[j] for c in self.field] for j in range(3)]
-        diagonal = [row[i] for i, row in enumerate(self.field)]
-        back_diagonal = [row[2 - i] for i, row in enumerate(self.field)]
-
-        return any((triple in row, triple in column, diagonal == triple, back_diagonal == triple))
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+from typing import List, Optional, Tuple
+
+if __package__:
+    # imported as tictactoe.tictactoe, e.g. by the stage tests: the modules next to it import each other by name
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# None of these modules imports tictactoe at run time, so running it as a script never loads it twice:
+# they are given the classes they need or name them in annotations only
+from board import MAX_SIZE, BitboardField, TicTacToeField, canonical_key
+from instrumentation import Instrumentation
+from mcts import mcts_search
+from pondering import PonderStats, Ponderer
+from pools import process_pool
+from renderers import RENDERERS
+from search import DEADLINE_CHECK_NODES, SearchContext, SearchTimeout, search_pool, search_root_move
+from tables import SolvedTable, TranspositionTable
+
+# Shared by every hard AI in the process, so scores survive across moves and games
+TRANSPOSITION_TABLE = TranspositionTable()
+# Default transposition table of an AI: TRANSPOSITION_TABLE as it is when the AI is made,
+# tournament workers replace it with a shared table
+DEFAULT_TABLE = object()
+
+FIELD_ENGINES = {
+    'list': TicTacToeField,
+    'bitboard': BitboardField,
+}
+
+
+def create_field(engine: str = 'list', size: int = 3, win_length: int = 3) -> TicTacToeField:
+    """Creates an empty game field backed by the chosen engine"""
+    try:
+        field_class = FIELD_ENGINES[engine]
+    except KeyError:
+        raise ParametersError(f'Unknown field engine: {engine}')
+    return field_class(size, win_length)
 
 
 class AbstractPlayer(ABC):
@@ -85,9 +61,40 @@ class AbstractPlayer(ABC):
 class AI(AbstractPlayer):
     """AI player"""
 
-    def __init__(self, game_field: [TicTacToeField], mark: str, difficult: str):
+    SEARCH_MODES = ('minimax', 'alphabeta', 'table', 'iterative', 'parallel', 'stack')
+
+    def __init__(self, game_field: [TicTacToeField], mark: str, difficult: str,
+                 transposition_table: TranspositionTable = DEFAULT_TABLE, search: str = None, time_budget: float = 0.05,
+                 playouts: Optional[int] = 2000, workers: int = None, verbose: bool = True, solved_table=None,
+                 ponder: 'PonderStats' = None):
+        """
+        transposition_table=None searches without a table.
+        solved_table is used by the 'table' search instead of the 3x3 SolvedTable,
+        any object with best_move(game_field), e.g. a RetrogradeTable of retrograde.py.
+        A hard AI given ponder stats searches while its user opponent types, see Ponderer.
+        """
         super(AI, self).__init__(game_field, mark)
+        if search is None:
+            # exhaustive search never finishes on larger boards
+            search = 'minimax' if game_field.size == 3 else 'iterative'
+        if search not in self.SEARCH_MODES:
+            raise ParametersError(f'Unknown search mode: {search}')
         self.difficult = difficult
+        self.transposition_table = TRANSPOSITION_TABLE if transposition_table is DEFAULT_TABLE else transposition_table
+        if search == 'table' and solved_table is None and (game_field.size, game_field.win_length) != (3, 3):
+            raise ParametersError('Solved table search needs the 3x3 board or a solved table of the board')
+        self.search = search
+        self.time_budget = time_budget
+        self.playouts = playouts
+        self.workers = workers or os.cpu_count() or 1
+        self.verbose = verbose
+        # nodes and info of the search of the AI's last move
+        self.nodes = 0
+        self.search_info = {}
+        if solved_table is None and search == 'table':
+            solved_table = SolvedTable.default()
+        self.solved_table = solved_table
+        self.ponderer = Ponderer(self, ponder) if ponder is not None and difficult == 'hard' else None
 
     def make_move(self):
         """AI makes a move"""
@@ -99,14 +106,30 @@ class AI(AbstractPlayer):
 
         elif self.difficult == 'hard':
             self.hard_move()
+
+        elif self.difficult == 'mcts':
+            self.mcts_move()
+
+        if not self.verbose:
+            return
         print(f'Making move level "{self.difficult}"')
+        if self.difficult == 'hard' and self.search == 'iterative' and self.search_info:
+            print(f'Searched to depth {self.search_info["depth"]}, {self.search_info["nodes"]} nodes')
+        elif self.difficult == 'mcts':
+            print(f'Made {self.search_info["playouts"]} playouts, '
+                  f'{self.search_info["playouts_per_second"]:.0f} playouts per second')
 
     def easy_move(self):
         """Makes a move of easy difficulty. Random move"""
-        empty_cells = game_field.get_empty_cells()
-        self.coordinates = random.choice(empty_cells)
+        self.coordinates = self._random_cell(self.game_field)
         self.game_field.move(self.coordinates)
 
+    @staticmethod
+    def _random_cell(game_field: TicTacToeField) -> Tuple:
+        """Picks a random empty cell"""
+        index = random.randrange(game_field.num_empty)
+        return next(islice(game_field.iter_empty_cells(), index, None))
+
     def medium_move(self):
         """
         Makes a move of medium difficulty.
@@ -122,81 +145,454 @@ class AI(AbstractPlayer):
 
     def hard_move(self):
         """Finds the best move based on MiniMax Algorithm in Game Theory"""
+        context = SearchContext()
+        answer = self.ponderer.answer(self.game_field) if self.ponderer is not None else None
+        self.coordinates = self.best_move(context=context) if answer is None else answer
+        self.nodes = context.nodes
+        self.search_info = context.info
+        self.game_field.move(self.coordinates)
+
+    def best_move(self, game_field: TicTacToeField = None, context: SearchContext = None) -> Tuple:
+        """
+        Returns the move hard_move would make in the position, the AI's own field by default.
+        The search runs on a fork of the field, so the field is never changed and may be used by others meanwhile.
+        Its nodes and info go to the context if given, calls with their own contexts may run at the same time.
+        """
+        game_field = self.game_field if game_field is None else game_field
+        context = SearchContext() if context is None else context
+        if game_field.num_empty == game_field.geometry.cells_count:
+            return self._random_cell(game_field)
+        if self.search == 'table':
+            return self.solved_table.best_move(game_field)
+        game_field = game_field.fork()
+        if self.search == 'iterative':
+            return self.iterative_deepening(game_field, context)
+        if self.search == 'parallel' and self.workers > 1:
+            return self.parallel_root_search(game_field, context)
+
+        pruning = self.search in ('alphabeta', 'parallel')
         best_score = -2
         best_move = None
-        for move in self.game_field.get_empty_cells():
-            if len(self.game_field.get_empty_cells()) == 9:
-                return self.easy_move()
-            self.game_field.move(move)
-            score = self.mini_max(False)
-            self.game_field.undo(move)
+        for move in game_field.iter_empty_cells():
+            game_field.move(move)
+            if pruning:
+                # only a strictly better score can replace the current best move, so worse ones may fail low
+                score = self.alpha_beta(False, max(best_score, -1), 1, game_field, context)
+            elif self.search == 'stack':
+                score = self.stack_mini_max(False, game_field, context)
+            else:
+                score = self.mini_max(False, game_field, context)
+            game_field.undo(move)
             if score > best_score:
                 best_score = score
                 best_move = move
-        self.game_field.move(best_move)
+                if pruning and best_score == 1:
+                    break
+        return best_move
+
+    def parallel_root_search(self, game_field: TicTacToeField, context: SearchContext) -> Tuple:
+        """
+        Scores the root moves at once in the worker processes of search_pool with alpha-beta pruning.
+        Picks the same move as the serial search, the first one with the best score:
+        the shared bound is always the score of a searched move, so the first move with the best score
+        either comes after the bound's move and is strictly better or comes before it and searches
+        below it (see search_root_move), either way it gets its exact score.
+        The first move is searched here before the others are sent out, so the workers start with its score
+        as the bound instead of a full window. Moves after a winning one can not be chosen,
+        they are cancelled unless already running.
+        """
+        started = time.perf_counter()
+        moves = game_field.get_empty_cells()
+        game_field.move(moves[0])
+        first_score = self.alpha_beta(False, -1, 1, game_field, context)
+        game_field.undo(moves[0])
+        if first_score == 1:
+            return moves[0]
+
+        # the workers search with the AI's table: a shared table is attached again, any other arrives empty
+        searcher = AI(game_field, self.mark, 'hard', transposition_table=self.transposition_table, search='alphabeta',
+                      workers=1, verbose=False)
+        pool, bound, slots = search_pool(self.workers)
+        # waits while SEARCH_SLOTS other searches of this process run
+        slot = slots.get()
+        try:
+            with bound.get_lock():
+                bound[2 * slot:2 * slot + 2] = [first_score, 0]
+            futures = [pool.submit(search_root_move, searcher, slot, number, move)
+                       for number, move in enumerate(moves[1:], 1)]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if not future.cancelled() and future.result()[0] == 1:
+                        for later in futures[futures.index(future) + 1:]:
+                            later.cancel()
+        finally:
+            slots.put(slot)
+
+        results = [(first_score, True, 0)]
+        results += [(-2, False, 0) if future.cancelled() else future.result() for future in futures]
+        context.nodes += sum(nodes for _, _, nodes in results)
+        context.info = {'nodes': context.nodes, 'time': time.perf_counter() - started}
+        best_score = max(score for score, exact, _ in results if exact)
+        return next(move for move, (score, exact, _) in zip(moves, results) if exact and score == best_score)
+
+    def mcts_move(self):
+        """
+        Makes a move chosen by Monte Carlo Tree Search.
+        Every worker process grows its own tree from the position with a share of the playouts,
+        the move visited most across all trees is played.
+        """
+        started = time.perf_counter()
+        seeds = [random.getrandbits(32) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [mcts_search(self.game_field.fork(), self.playouts, self.time_budget, seeds[0])]
+        else:
+            share = None if self.playouts is None else -(-self.playouts // self.workers)
+            pool = process_pool(self.workers)
+            results = list(pool.map(mcts_search, [self.game_field.fork()] * self.workers, [share] * self.workers,
+                                    [self.time_budget] * self.workers, seeds))
+
+        visits = {}
+        total = 0
+        for root_stats, done in results:
+            total += done
+            for move, (move_visits, _) in root_stats.items():
+                visits[move] = visits.get(move, 0) + move_visits
+        elapsed = time.perf_counter() - started
+        self.search_info = {'playouts': total, 'time': elapsed, 'playouts_per_second': total / elapsed}
+        # ties go to the first empty cell, like the other levels
+        self.coordinates = max(self.game_field.iter_empty_cells(), key=lambda move: visits.get(move, 0))
+        self.game_field.move(self.coordinates)
 
     def _get_priority_cell(self, mark: str) -> bool:
         """Get priority cell, return True if get it otherwise False"""
+        cell = self.game_field.get_threat(mark)
+        if cell is None:
+            return False
+        self.coordinates = cell
+        return True
 
-        # check for horizontal items in a row as two mark and empty one
-        for row in range(len(self.game_field.field)):
-            if self.game_field.field[row].count(mark) == 2 and self.game_field.field[row].count(
-                    ' ') == 1:
-                self.coordinates = [row, self.game_field.field[row].index(' ')]
-                return True
-
-        # check for vertical items in a row as two mark and empty one
-        for col in range(len(self.game_field.field[0])):
-            column = [self.game_field.field[row][col] for row in
-                      range(len(self.game_field.field))]
-            if column.count(mark) == 2 and column.count(' ') == 1:
-                self.coordinates = [column.index(' '), col]
-                return True
-
-        # check the elements in a row diagonally from the upper left corner
-        diagonal = [self.game_field.field[i][i] for i in range(len(self.game_field.field))]
-        if diagonal.count(mark) == 2 and diagonal.count(' ') == 1:
-            idx = diagonal.index(' ')
-            self.coordinates = [idx, idx]
-            return True
-
-        # check the elements in a row diagonally from the lower left corner
-        diagonal = [self.game_field.field[i][len(
-            self.game_field.field) - 1 - i] for i in range(len(self.game_field.field))]
-        if diagonal.count(mark) == 2 and diagonal.count(' ') == 1:
-            idx = diagonal.index(' ')
-            self.coordinates = [idx, len(self.game_field.field) - 1 - idx]
-            return True
-
-        return False
-
-    def mini_max(self, is_max_turn: bool) -> int:
-        """MiniMax Algorithm in Game Theory"""
+    def _known_score(self, game_field: TicTacToeField, probe: bool = True) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Returns the score of the position if it needs no search, the result of a finished game
+        or the score in the transposition table, else None, and the key to store its score under with _store.
+        The key is None without a table or with probe=False.
+        """
         result = game_field.check_winner()
-
         if result == self.mark:
-            return 1
+            return 1, None
         elif result == self.opponent_mark:
-            return -1
+            return -1, None
         elif result == 'Draw':
-            return 0
+            return 0, None
+        if self.transposition_table is None or not probe:
+            return None, None
+
+        key = canonical_key(game_field)
+        score = self.transposition_table.get(key)
+        # scores are stored from X's point of view, so AIs playing either side can share the table
+        return (None if score is None else score * (1 if self.mark == 'X' else -1)), key
+
+    def _store(self, key: Optional[int], score: int):
+        """Stores the score of the position under its key from _known_score, nothing is stored without a key"""
+        if key is not None:
+            self.transposition_table.put(key, score * (1 if self.mark == 'X' else -1))
+
+    def mini_max(self, is_max_turn: bool, game_field: TicTacToeField = None, context: SearchContext = None) -> int:
+        """MiniMax Algorithm in Game Theory, searches the AI's own field by default"""
+        game_field = self.game_field if game_field is None else game_field
+        context = SearchContext() if context is None else context
+        context.nodes += 1
+        score, key = self._known_score(game_field)
+        if score is not None:
+            return score
 
         scores = []
-        for move in self.game_field.get_empty_cells():
-            self.game_field.move(move)
-            scores.append(self.mini_max(not is_max_turn))
-            self.game_field.undo(move)
+        for move in game_field.iter_empty_cells():
+            game_field.move(move)
+            scores.append(self.mini_max(not is_max_turn, game_field, context))
+            game_field.undo(move)
 
-        return max(scores) if is_max_turn else min(scores)
+        score = max(scores) if is_max_turn else min(scores)
+        self._store(key, score)
+        return score
+
+    def stack_mini_max(self, is_max_turn: bool, game_field: TicTacToeField = None,
+                       context: SearchContext = None) -> int:
+        """
+        MiniMax Algorithm without recursion, searches the AI's own field by default.
+        Visits positions and uses the transposition table in the same order as mini_max, so it returns the same scores,
+        but keeps its state in lists with one frame per ply allocated up front: the next cell to try,
+        the best score so far and the table key. Memory depends only on the number of empty cells
+        and the depth is not limited by the recursion limit.
+        """
+        game_field = self.game_field if game_field is None else game_field
+        context = SearchContext() if context is None else context
+        geometry = game_field.geometry
+        frames = game_field.num_empty + 1
+        cursors = [0] * frames
+        scores = [0] * frames
+        keys = [None] * frames
+        max_turns = (is_max_turn, not is_max_turn)
+
+        depth = 0
+        entering = True
+        score = None
+        while True:
+            is_max = max_turns[depth % 2]
+            if entering:
+                context.nodes += 1
+                score, keys[depth] = self._known_score(game_field)
+                if score is None:
+                    cursors[depth] = 0
+                    scores[depth] = -2 if is_max else 2
+            else:
+                # back from the child searched from this frame, score is its result
+                cell = cursors[depth] - 1
+                game_field.undo(geometry.cells[cell])
+                if score > scores[depth] if is_max else score < scores[depth]:
+                    scores[depth] = score
+                score = None
+
+            if score is None:
+                x_bits, o_bits = game_field.bitmasks()
+                occupied = x_bits | o_bits
+                cell = cursors[depth]
+                while cell < geometry.cells_count and occupied >> cell & 1:
+                    cell += 1
+                if cell < geometry.cells_count:
+                    cursors[depth] = cell + 1
+                    game_field.move(geometry.cells[cell])
+                    depth += 1
+                    entering = True
+                    continue
+                # every child searched, the frame is finished
+                score = scores[depth]
+                self._store(keys[depth], score)
+
+            if not depth:
+                return score
+            depth -= 1
+            entering = False
+
+    def alpha_beta(self, is_max_turn: bool, alpha: int, beta: int, game_field: TicTacToeField = None,
+                   context: SearchContext = None) -> int:
+        """
+        MiniMax Algorithm with alpha-beta pruning, searches the AI's own field by default.
+        Stops searching a position as soon as its score falls outside the (alpha, beta) window,
+        in that case the returned score is only a bound, not the exact one.
+        """
+        game_field = self.game_field if game_field is None else game_field
+        context = SearchContext() if context is None else context
+        context.nodes += 1
+        score, key = self._known_score(game_field)
+        if score is not None:
+            return score
+
+        alpha_start, beta_start = alpha, beta
+        score = -2 if is_max_turn else 2
+        for move in self._ordered_moves(game_field):
+            game_field.move(move)
+            child_score = self.alpha_beta(not is_max_turn, alpha, beta, game_field, context)
+            game_field.undo(move)
+            if is_max_turn:
+                score = max(score, child_score)
+                alpha = max(alpha, score)
+            else:
+                score = min(score, child_score)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+
+        # a bound is still exact when it is a win or a loss, nothing lies beyond them
+        if alpha_start < score < beta_start or score in (-1, 1):
+            self._store(key, score)
+        return score
+
+    def iterative_deepening(self, game_field: TicTacToeField, context: SearchContext) -> Tuple:
+        """
+        Searches one ply deeper at a time until the time budget runs out or the whole game tree is searched.
+        Returns the best move of the deepest completed iteration. When not even the first iteration completes,
+        it returns the best root move that iteration scored, or the first move in pruning order.
+        """
+        started = time.perf_counter()
+        context.deadline = started + self.time_budget
+        lines = self.line_state(game_field)
+        best_move = None
+        for depth in range(1, game_field.num_empty + 1):
+            evaluations = context.evaluations
+            try:
+                best_move = self._depth_limited_root(game_field, depth, lines, context)
+            except SearchTimeout:
+                if best_move is None:
+                    best_move = context.root_move or self._ordered_moves(game_field, lines)[0]
+                break
+            complete = context.evaluations == evaluations
+            context.info = {
+                'depth': depth, 'nodes': context.nodes, 'complete': complete, 'time': time.perf_counter() - started,
+            }
+            if complete:
+                break
+        return best_move
+
+    def _depth_limited_root(self, game_field: TicTacToeField, depth: int, lines: Tuple[int, int, int],
+                            context: SearchContext) -> Tuple:
+        """
+        Chooses a root move like hard_move does, looking at most depth plies ahead.
+        The best move so far is kept in the context's root_move.
+        """
+        best_score = -2
+        context.root_move = None
+        for move in game_field.iter_empty_cells():
+            child_lines = self._line_state_after(game_field, move, lines)
+            game_field.move(move)
+            try:
+                score = self.depth_limited(False, max(best_score, -1), 1, depth - 1, game_field, child_lines, context)
+            finally:
+                game_field.undo(move)
+            if score > best_score:
+                best_score = score
+                context.root_move = move
+                if best_score == 1:
+                    break
+        return context.root_move
+
+    def depth_limited(self, is_max_turn: bool, alpha: float, beta: float, depth: int, game_field: TicTacToeField,
+                      lines: Tuple[int, int, int], context: SearchContext) -> float:
+        """
+        MiniMax Algorithm with alpha-beta pruning that stops depth plies ahead.
+        Unfinished positions at the cutoff are scored like evaluate does, strictly between a loss and a win,
+        from lines, the line_state of the field kept up to date move by move.
+        Raises SearchTimeout once the deadline of the context passes.
+        """
+        context.nodes += 1
+        if not context.nodes % DEADLINE_CHECK_NODES and time.perf_counter() > context.deadline:
+            raise SearchTimeout
+        # no table probe at the cutoff, on large boards the key of a position costs many times its score
+        score, key = self._known_score(game_field, probe=depth > 0)
+        if score is not None:
+            return score
+
+        if not depth:
+            context.evaluations += 1
+            return self._squash(lines[0])
+
+        evaluations = context.evaluations
+        alpha_start, beta_start = alpha, beta
+        score = -2 if is_max_turn else 2
+        for move in self._ordered_moves(game_field, lines):
+            child_lines = self._line_state_after(game_field, move, lines)
+            game_field.move(move)
+            try:
+                child_score = self.depth_limited(not is_max_turn, alpha, beta, depth - 1, game_field, child_lines,
+                                                 context)
+            finally:
+                game_field.undo(move)
+            if is_max_turn:
+                score = max(score, child_score)
+                alpha = max(alpha, score)
+            else:
+                score = min(score, child_score)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+
+        # only scores that did not depend on the evaluation at the cutoff are exact
+        exact = context.evaluations == evaluations and alpha_start < score < beta_start
+        if exact or score in (-1, 1):
+            self._store(key, score)
+        return score
+
+    def evaluate(self, game_field: TicTacToeField) -> float:
+        """
+        Heuristic score of an unfinished position from the AI's point of view.
+        Every line still open for one side counts for it, more the more marks it already has.
+        """
+        return self._squash(self.line_state(game_field)[0])
+
+    @staticmethod
+    def _squash(total: int) -> float:
+        """Maps a line score of line_state strictly between a loss and a win"""
+        return 0.9 * total / (1 + abs(total))
+
+    def line_state(self, game_field: TicTacToeField) -> Tuple[int, int, int]:
+        """
+        Line score of the position, the sum evaluate scores, and the empty cells where X and where O complete a line
+        at once, as bitmasks. Scans every line, the depth limited search updates it with _line_state_after instead.
+        """
+        geometry = game_field.geometry
+        x_bits, o_bits = game_field.bitmasks()
+        own, rival = (x_bits, o_bits) if self.mark == 'X' else (o_bits, x_bits)
+        empty = geometry.full_mask & ~(x_bits | o_bits)
+        total = x_wins = o_wins = 0
+        for mask in geometry.win_masks:
+            if not rival & mask:
+                total += 4 ** bin(own & mask).count('1') - 1
+            elif not own & mask:
+                total -= 4 ** bin(rival & mask).count('1') - 1
+            free = mask & empty
+            if free and not free & (free - 1):
+                if x_bits & mask == mask ^ free:
+                    x_wins |= free
+                elif o_bits & mask == mask ^ free:
+                    o_wins |= free
+        return total, x_wins, o_wins
+
+    def _line_state_after(self, game_field: TicTacToeField, move: Tuple, lines: Tuple[int, int, int]
+                          ) -> Tuple[int, int, int]:
+        """
+        line_state of the position after the side to move plays move, given lines of the position before it.
+        Only the lines through the move change: an open line of the mover gains a mark, a line of its rival
+        is closed, and a line left one mark short of the win adds its empty cell to the mover's wins.
+        """
+        geometry = game_field.geometry
+        index = move[0] * geometry.size + move[1]
+        bit = 1 << index
+        x_bits, o_bits = game_field.bitmasks()
+        mover, other = (x_bits, o_bits) if game_field.turn == 'X' else (o_bits, x_bits)
+        short = geometry.win_length - 2
+        delta = wins = 0
+        for mask in geometry.cell_masks[index]:
+            if not other & mask:
+                count = bin(mover & mask).count('1')
+                delta += 3 * 4 ** count
+                if count == short:
+                    wins |= mask & ~(mover | bit)
+            elif not mover & mask:
+                delta += 4 ** bin(other & mask).count('1') - 1
+        total, x_wins, o_wins = lines
+        total += delta if game_field.turn == self.mark else -delta
+        if game_field.turn == 'X':
+            return total, (x_wins | wins) & ~bit, o_wins & ~bit
+        return total, x_wins & ~bit, (o_wins | wins) & ~bit
+
+    def _ordered_moves(self, game_field: TicTacToeField, lines: Tuple[int, int, int] = None) -> List[Tuple]:
+        """
+        Empty cells ordered for pruning: immediate wins, then blocks, then centre, then corners, then the rest.
+        Wins and blocks are taken from lines, the line_state of the field, worked out here if not given.
+        """
+        geometry = game_field.geometry
+        _, x_wins, o_wins = self.line_state(game_field) if lines is None else lines
+        wins, blocks = (x_wins, o_wins) if game_field.turn == 'X' else (o_wins, x_wins)
+
+        def priority(cell: Tuple) -> int:
+            index = cell[0] * geometry.size + cell[1]
+            if wins >> index & 1:
+                return 0
+            elif blocks >> index & 1:
+                return 1
+            elif geometry.centre_mask >> index & 1:
+                return 2
+            elif geometry.corners_mask >> index & 1:
+                return 3
+            return 4
+
+        return sorted(game_field.iter_empty_cells(), key=priority)
 
 
 class User(AbstractPlayer):
     """Real player"""
-    CONVERT_COORDINATES = {
-        ('1', '3'): (0, 0), ('2', '3'): (0, 1), ('3', '3'): (0, 2),
-        ('1', '2'): (1, 0), ('2', '2'): (1, 1), ('3', '2'): (1, 2),
-        ('1', '1'): (2, 0), ('2', '1'): (2, 1), ('3', '1'): (2, 2),
-    }
 
     def make_move(self):
         """User makes a move"""
@@ -207,7 +603,7 @@ class User(AbstractPlayer):
                 print('You should enter numbers!')
                 continue
             elif validation_result == 'Incorrect coordinates':
-                print('Coordinates should be from 1 to 3!')
+                print(f'Coordinates should be from 1 to {self.game_field.size}!')
                 continue
             elif validation_result == 'Cell is occupied':
                 print('This cell is occupied! Choose another one!')
@@ -223,11 +619,13 @@ class User(AbstractPlayer):
         except (ValueError, IndexError):
             return 'Not a Number'
 
-        if not (1 <= x <= 3 and 1 <= y <= 3):
+        size = self.game_field.size
+        if not (1 <= x <= size and 1 <= y <= size):
             return 'Incorrect coordinates'
 
-        self.coordinates = self.CONVERT_COORDINATES.get(coordinates)
-        if self.coordinates not in self.game_field.get_empty_cells():
+        # x is the column from the left, y is the row from the bottom
+        self.coordinates = (size - y, x - 1)
+        if not self.game_field.is_empty(self.coordinates):
             return 'Cell is occupied'
         return 'Valid'
 
@@ -235,56 +633,129 @@ class User(AbstractPlayer):
 class GameFactory:
     """Creates setup game"""
 
-    def __init__(self, player_1: [User, AI], player_2: [User, AI], game_field: [TicTacToeField]):
-        self.player_1 = User(game_field, mark='X') if player_1 == 'user' else AI(game_field, 'X', player_1)
-        self.player_2 = User(game_field, mark='O') if player_2 == 'user' else AI(game_field, 'O', player_2)
+    def __init__(self, player_1: [User, AI], player_2: [User, AI], game_field: [TicTacToeField], recorder=None,
+                 **ai_options):
+        """
+        ai_options are passed on to every AI player, e.g. verbose=False for games without console output.
+        A recorder is told the players by begin(player_1, player_2, game_field)
+        and every move by record(coordinates, game_field), see records.py.
+        """
+        self.player_1 = (User(game_field, mark='X') if player_1 == 'user'
+                         else AI(game_field, 'X', player_1, **ai_options))
+        self.player_2 = (User(game_field, mark='O') if player_2 == 'user'
+                         else AI(game_field, 'O', player_2, **ai_options))
+        self.game_field = game_field
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.begin(player_1, player_2, game_field)
         self.turn = self.player_1
 
     def next_move(self):
         """Makes a move and passes the move to another player."""
+        opponent = self.player_2 if self.turn == self.player_1 else self.player_1
+        pondering = isinstance(self.turn, User) and isinstance(opponent, AI) and opponent.ponderer is not None
+        if pondering:
+            opponent.ponderer.start()
         self.turn.make_move()
+        if self.recorder is not None:
+            self.recorder.record(self.turn.coordinates, self.game_field)
+        if pondering and self.game_field.check_winner():
+            # no answer is needed, the search must not run on into the next game
+            opponent.ponderer.stop()
+        self.pass_turn()
+
+    def pass_turn(self):
+        """Passes the move to another player."""
         self.turn = self.player_1 if self.turn == self.player_2 else self.player_2
 
 
+# Collects stats of the whole process when enabled, e.g. with --stats
+INSTRUMENTATION = Instrumentation((TicTacToeField, BitboardField), AI)
+
+
 class ParametersError(Exception):
     pass
 
 
+GAME_CONFIGURATION = ('user', 'easy', 'medium', 'hard', 'mcts')
+
+
+def parse_command_line(command_line: str):
+    """
+    Parses one command, returns 'break' for exit or players, board size and win length for start.
+    A game is started with 'start <player_1> <player_2> [size [win_length]]', the board is 3x3 by default
+    and the win length defaults to the board size, the size is at most MAX_SIZE.
+    Raises ParametersError for anything else.
+    """
+    command = command_line.split(' ')
+    try:
+        if len(command) == 1 and command[0] == 'exit':
+            return 'break'
+        elif 3 <= len(command) <= 5 and command[0] == 'start':
+            if command[1] in GAME_CONFIGURATION and command[2] in GAME_CONFIGURATION:
+                player_1 = command[1]
+                player_2 = command[2]
+                size = int(command[3]) if len(command) > 3 else 3
+                win_length = int(command[4]) if len(command) > 4 else size
+                if 3 <= size <= MAX_SIZE and 3 <= win_length <= size:
+                    return player_1, player_2, size, win_length
+    except ValueError:
+        pass
+    raise ParametersError
+
+
 def parse_command():
     """Parse user commands for setup game"""
-    game_configuration = ('user', 'easy', 'medium', 'hard')
     while True:
-        command = input('Input command: ').split(' ')
         try:
-            if len(command) == 1 and command[0] == 'exit':
-                return 'break'
-            elif len(command) == 3 and command[0] == 'start':
-                if command[1] in game_configuration and command[2] in game_configuration:
-                    player_1 = command[1]
-                    player_2 = command[2]
-                    return player_1, player_2
-            else:
-                raise ParametersError
-        except (IndexError, ParametersError):
+            return parse_command_line(input('Input command: '))
+        except ParametersError:
             print('Bad parameters!')
 
 
-if __name__ == '__main__':
-    while True:
-        command = parse_command()
-        if command == 'break':
-            break
-
-        player_1 = command[0]
-        player_2 = command[1]
-
-        game_field = TicTacToeField()
-        game = GameFactory(player_1, player_2, game_field)
-        game_field.print_game_field()
+def main(argv: List[str] = None):
+    """Runs the console game, argv defaults to the command line arguments"""
+    parser = argparse.ArgumentParser(description='Tic-tac-toe with AI')
+    parser.add_argument('--stats', action='store_true', help='print search and move time stats at exit')
+    parser.add_argument('--render', default='text', choices=RENDERERS, help='how boards are drawn')
+    parser.add_argument('--search', choices=AI.SEARCH_MODES, help='search of the hard AI, minimax on 3x3 by default')
+    parser.add_argument('--ponder', action='store_true',
+                        help='let the hard AI search while the user types, print the ponder hit rate at exit')
+    args = parser.parse_args(argv)
+    renderer = RENDERERS[args.render]()
+    ponder_stats = PonderStats() if args.ponder else None
+    if args.stats:
+        INSTRUMENTATION.enable()
+
+    try:
         while True:
-            game.next_move()
-            game_field.print_game_field()
-            winner = game_field.check_winner()
-            if winner:
-                print(winner if winner == 'Draw' else f'{winner} wins!')
+            command = parse_command()
+            if command == 'break':
                 break
+
+            player_1, player_2, size, win_length = command
+
+            game_field = TicTacToeField(size, win_length)
+            try:
+                game = GameFactory(player_1, player_2, game_field, search=args.search, ponder=ponder_stats)
+            except ParametersError:
+                # e.g. the solved table search on a board other than 3x3
+                print('Bad parameters!')
+                continue
+            renderer.render(game_field)
+            while True:
+                game.next_move()
+                renderer.render(game_field)
+                winner = game_field.check_winner()
+                if winner:
+                    print(winner if winner == 'Draw' else f'{winner} wins!')
+                    break
+    finally:
+        if args.stats:
+            print(INSTRUMENTATION.summary(), file=sys.stderr)
+        if args.ponder:
+            print(ponder_stats.summary(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
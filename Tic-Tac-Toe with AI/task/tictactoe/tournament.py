@@ -0,0 +1,110 @@
+"""Plays AI-vs-AI games without console output across a process pool and reports win/draw/loss tables"""
+import argparse
+import random
+import time
+from itertools import product
+from multiprocessing import Pool
+from typing import Dict, Iterator, Sequence, Tuple
+
+import tictactoe
+from shared_table import SharedTranspositionTable
+from tictactoe import GameFactory, create_field
+
+LEVELS = ('easy', 'medium', 'hard')
+RESULTS = ('X', 'O', 'Draw')
+
+
+def play_game(player_1: str, player_2: str, size: int = 3, win_length: int = 3, engine: str = 'list') -> str:
+    """Plays one game silently on a field of the engine and returns 'X', 'O' or 'Draw'"""
+    game_field = create_field(engine, size, win_length)
+    game = GameFactory(player_1, player_2, game_field, verbose=False)
+    while True:
+        game.next_move()
+        winner = game_field.check_winner()
+        if winner:
+            return winner
+
+
+def use_table(table: SharedTranspositionTable):
+    """Pool initializer, makes the hard AIs of the worker search with the shared table"""
+    tictactoe.TRANSPOSITION_TABLE = table
+
+
+def play_chunk(task: Tuple) -> Tuple[str, str, Dict[str, int]]:
+    """
+    Plays a chunk of games of one pairing.
+    The random generator is seeded from the tournament seed, the pairing and the chunk number,
+    so results do not depend on which worker plays the chunk.
+    """
+    player_1, player_2, games, seed, chunk, size, win_length = task
+    random.seed(f'{seed}:{player_1}:{player_2}:{chunk}')
+    counts = dict.fromkeys(RESULTS, 0)
+    for _ in range(games):
+        counts[play_game(player_1, player_2, size, win_length)] += 1
+    return player_1, player_2, counts
+
+
+def run_tournament(levels: Sequence[str] = LEVELS, games: int = 1000, workers: int = None, seed: int = 0,
+                   chunk_size: int = 500, size: int = 3, win_length: int = 3,
+                   table: SharedTranspositionTable = None) -> Iterator[Dict]:
+    """
+    Plays games for every pairing of levels and yields the aggregated results after each finished chunk.
+    Results map (player_1, player_2) to counts of 'X' wins, 'O' wins and draws.
+    With a shared table all workers reuse each other's searches instead of keeping a table each.
+    """
+    tasks = [
+        (player_1, player_2, min(chunk_size, games - start), seed, start // chunk_size, size, win_length)
+        for player_1, player_2 in product(levels, repeat=2)
+        for start in range(0, games, chunk_size)
+    ]
+    results = {pairing: dict.fromkeys(RESULTS, 0) for pairing in product(levels, repeat=2)}
+    initializer, initargs = (use_table, (table,)) if table is not None else (None, ())
+    with Pool(workers, initializer, initargs) as pool:
+        for player_1, player_2, counts in pool.imap_unordered(play_chunk, tasks):
+            for result, count in counts.items():
+                results[player_1, player_2][result] += count
+            yield results
+
+
+def format_table(results: Dict, elapsed: float) -> str:
+    """Formats results as a table, one row per pairing"""
+    lines = [f'{"X player":<10}{"O player":<10}{"X wins":>10}{"O wins":>10}{"Draws":>10}']
+    total = 0
+    for (player_1, player_2), counts in results.items():
+        total += sum(counts.values())
+        lines.append(f'{player_1:<10}{player_2:<10}' + ''.join(f'{counts[result]:>10}' for result in RESULTS))
+    lines.append(f'{total} games in {elapsed:.2f} s, {total / elapsed:.0f} games per second')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=1000, help='games per pairing')
+    parser.add_argument('--levels', nargs='+', default=LEVELS, choices=LEVELS)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=500, help='games a worker plays per task')
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=3)
+    parser.add_argument('--shared-cache', type=int, default=0, metavar='SLOTS',
+                        help='share a transposition table of this many slots between the workers')
+    parser.add_argument('--cache-file', help='load the shared table from this file if it exists and save it at the end')
+    args = parser.parse_args()
+
+    table = SharedTranspositionTable.create(args.shared_cache, args.cache_file) if args.shared_cache else None
+    started = time.perf_counter()
+    results = {}
+    try:
+        for results in run_tournament(args.levels, args.games, args.workers, args.seed, args.chunk_size,
+                                      args.size, args.win_length, table):
+            pass
+        print(format_table(results, time.perf_counter() - started))
+        if table is not None and args.cache_file:
+            table.save(args.cache_file)
+    finally:
+        if table is not None:
+            table.close()
+
+
+if __name__ == '__main__':
+    main()